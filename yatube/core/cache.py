@@ -0,0 +1,106 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.05
+JITTER = 0.1
+
+
+def get_or_compute(key, compute, timeout, stale_timeout=None, jitter=JITTER):
+    """Достает значение из кэша, пересчитывая его в одном процессе.
+
+    В кэше лежит пара (значение, момент устаревания). Пока значение
+    свежее, оно просто возвращается. После устаревания пересчет берет
+    тот, кто первым захватил блокировку через cache.add, а остальные
+    отдают старое значение еще stale_timeout секунд (по умолчанию
+    столько же, сколько timeout). При полном промахе ждущие запросы
+    коротко опрашивают кэш, чтобы не считать одно и то же всем скопом.
+    Срок свежести случайно удлиняется на долю jitter, чтобы ключи,
+    записанные одновременно, не устаревали тоже одновременно.
+    """
+    if stale_timeout is None:
+        stale_timeout = timeout
+    lock_key = f"{key}:lock"
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until:
+            return value
+        acquired = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not acquired:
+            return value
+    else:
+        acquired = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not acquired:
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL)
+                entry = cache.get(key)
+                if entry is not None:
+                    return entry[0]
+    try:
+        value = compute()
+        timeout *= 1 + random.uniform(0, jitter)
+        cache.set(key, (value, time.time() + timeout), timeout + stale_timeout)
+    finally:
+        # Чужую блокировку не снимаем: ее держатель еще считает
+        if acquired:
+            cache.delete(lock_key)
+    return value
+
+
+def expire(key):
+    """Помечает значение устаревшим, не удаляя его.
+
+    Следующий читатель пересчитает значение, остальные пока получат
+    старое.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        cache.set(key, (entry[0], 0), LOCK_TIMEOUT)
+
+
+class LocalCache:
+    """LRU-кэш в памяти процесса с ограничением размера и сроком жизни.
+
+    Подходит для маленьких горячих объектов, ради которых не хочется
+    ходить даже в общий кэш.
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if time.monotonic() > expires:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Бэкенды с атомарными add/incr, которые сохраняют срок жизни ключа при
+# incr и общие для всех процессов
+ATOMIC_CACHE_BACKENDS = (
+    'django.core.cache.backends.memcached.MemcachedCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Блокировки, счетчики и отметки держатся на общем атомарном кэше.
+
+    LocMemCache годится только для разработки в одном процессе, а
+    файловый кэш и кэш в БД делают add/incr чтением и записью, которые
+    гоняются между процессами.
+    """
+    if settings.CACHES['default']['BACKEND'] in ATOMIC_CACHE_BACKENDS:
+        return []
+    return [
+        Error(
+            'Кэш по умолчанию не общий для процессов или не атомарный.',
+            hint=(
+                'Задайте CACHE_BACKEND (memcached или redis) и '
+                'CACHE_LOCATION. Иначе процессы не видят прогрев, '
+                'блокировки пересчета и сброс кэша пользователей, а '
+                'счетчики ограничения частоты теряют запросы.'
+            ),
+            id='core.E001',
+        )
+    ]
@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.utils import get_following_ids
+
+
+def following(request):
+    """Добавляет множество id авторов, на которых подписан пользователь.
+
+    Множество загружается лениво и не больше одного раза за запрос.
+    """
+    return {
+        'following_ids': SimpleLazyObject(
+            lambda: get_following_ids(request.user)
+        )
+    }
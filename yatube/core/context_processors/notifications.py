@@ -0,0 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.notifications import get_unread_count
+
+
+def notifications(request):
+    """Добавляет число непрочитанных уведомлений для значка в шапке."""
+    return {
+        'unread_notifications': SimpleLazyObject(
+            lambda: get_unread_count(request.user)
+        )
+    }
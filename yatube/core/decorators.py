@@ -0,0 +1,73 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+RATELIMIT_CACHE_KEY = "ratelimit:{}:{}:{}"
+
+
+def _client_key(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _hit(key, period):
+    """Увеличивает счетчик окна и возвращает новое значение.
+
+    Атомарно только на бэкендах с собственными add/incr: LocMemCache в
+    пределах процесса, memcached и redis между процессами (их требует
+    проверка core.E001). Файловый кэш и кэш в БД делают incr чтением и
+    записью, и при наплыве параллельных запросов счетчик занижается.
+    """
+    if cache.add(key, 1, period * 2):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключ истек между add и incr.
+        cache.set(key, 1, period * 2)
+        return 1
+
+
+def ratelimit(name, methods=None):
+    """Ограничивает частоту запросов к view скользящим окном.
+
+    Лимит (число запросов, окно в секундах) берется из
+    settings.RATELIMITS по имени view, отдельно для каждого пользователя
+    или IP. Счетчик текущего окна увеличивается через cache.add/incr
+    (см. _hit о том, на каких бэкендах это атомарно),
+    предыдущее окно учитывается с весом оставшейся доли: на запрос
+    приходится два обращения к кэшу независимо от нагрузки. При
+    превышении отвечает 429 с заголовком Retry-After.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limit = getattr(settings, "RATELIMITS", {}).get(name)
+            if limit is None or (methods and request.method not in methods):
+                return view(request, *args, **kwargs)
+            count, period = limit
+            now = time.time()
+            window = int(now // period)
+            elapsed = now - window * period
+            client = _client_key(request)
+            previous = cache.get(
+                RATELIMIT_CACHE_KEY.format(name, client, window - 1), 0
+            )
+            current = _hit(
+                RATELIMIT_CACHE_KEY.format(name, client, window), period
+            )
+            weight = (period - elapsed) / period
+            if previous * weight + current > count:
+                response = HttpResponse(
+                    "Слишком много запросов, попробуйте позже", status=429
+                )
+                response["Retry-After"] = math.ceil(period - elapsed)
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
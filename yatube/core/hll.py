@@ -0,0 +1,48 @@
+import hashlib
+import math
+
+# 2 ** 10 регистров по байту: ~1 КБ на счетчик, ошибка около 3%
+PRECISION = 10
+
+
+class HyperLogLog:
+    """Приблизительный счетчик уникальных значений (HyperLogLog).
+
+    Размер не зависит от числа значений, а два счетчика объединяются
+    поэлементным максимумом регистров, поэтому их удобно копить
+    отдельно и сливать в общем кэше.
+    """
+
+    def __init__(self, registers=None, precision=PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers or self.size)
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(
+            max(a, b) for a, b in zip(self.registers, other.registers)
+        )
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = (
+            alpha
+            * self.size ** 2
+            / sum(2.0 ** -register for register in self.registers)
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        return round(estimate)
+
+    def to_bytes(self):
+        return bytes(self.registers)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.warmup import hot_paths, warm
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогревает кэш самыми посещаемыми страницами, например сразу "
+        "после деплоя."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top", type=int, default=settings.CACHE_WARM_TOP
+        )
+        parser.add_argument(
+            "paths", nargs="*", help="Дополнительные адреса для прогрева."
+        )
+
+    def handle(self, *args, **options):
+        paths = hot_paths(options["top"])
+        paths += [path for path in options["paths"] if path not in paths]
+        for path, status in warm(paths).items():
+            self.stdout.write(f"{status} {path}")
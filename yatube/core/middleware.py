@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PAGE_HITS_CACHE_KEY = "page_hits"
+PAGE_HITS_FLUSH_EVERY = 100
+PAGE_HITS_TRACKED = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class PageHitsMiddleware:
+    """Считает просмотры страниц, которые стоит прогревать в кэше.
+
+    Счетчики копятся в памяти процесса и раз в PAGE_HITS_FLUSH_EVERY
+    просмотров сливаются в общий кэш, где хранится только верхушка из
+    PAGE_HITS_TRACKED адресов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.hits = Counter()
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        match = request.resolver_match
+        if (
+            request.method == "GET"
+            and response.status_code == 200
+            and match is not None
+            and match.view_name in settings.CACHE_WARM_VIEWS
+        ):
+            self.count(request.get_full_path())
+        return response
+
+    def count(self, path):
+        with self.lock:
+            self.hits[path] += 1
+            self.pending += 1
+            if self.pending < PAGE_HITS_FLUSH_EVERY:
+                return
+            hits, self.hits, self.pending = self.hits, Counter(), 0
+        total = cache.get(PAGE_HITS_CACHE_KEY) or Counter()
+        total.update(hits)
+        cache.set(
+            PAGE_HITS_CACHE_KEY,
+            Counter(dict(total.most_common(PAGE_HITS_TRACKED))),
+            None,
+        )
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """execute_wrapper, который считает запросы и время SQL."""
+
+    def __init__(self):
+        self.queries = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.time += time.monotonic() - started
+
+
+class QueryBudgetMiddleware:
+    """Следит, чтобы страницы укладывались в бюджет запросов к БД.
+
+    Бюджеты задаются в QUERY_BUDGETS по имени view. Превышение числа
+    запросов или суммарного времени SQL пишется в лог, а при
+    QUERY_BUDGET_RAISE (в тестах) приводит к QueryBudgetExceeded,
+    чтобы новый N+1 ронял тесты, а не продакшен.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_BUDGETS:
+            return self.get_response(request)
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(stats))
+            response = self.get_response(request)
+        match = request.resolver_match
+        budget = match and settings.QUERY_BUDGETS.get(match.view_name)
+        if budget:
+            self.check(request, match.view_name, budget, stats)
+        return response
+
+    def check(self, request, view_name, budget, stats):
+        if (
+            stats.queries <= budget["queries"]
+            and stats.time <= budget["time"]
+        ):
+            return
+        message = (
+            "%s (%s): %d запросов за %.3f с, бюджет %d запросов за %.3f с"
+            % (
+                view_name,
+                request.get_full_path(),
+                stats.queries,
+                stats.time,
+                budget["queries"],
+                budget["time"],
+            )
+        )
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.dispatch import receiver
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """Закрывает оборвавшиеся постоянные соединения до начала запроса.
+
+    Django закрывает соединение по возрасту (CONN_MAX_AGE) и после
+    ошибок, но не замечает соединение, которое сервер БД разорвал
+    между запросами. Такое соединение закрывается, и первый же запрос
+    откроет новое.
+    """
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for conn in connections.all():
+        if conn.connection is not None and not conn.in_atomic_block:
+            if not conn.is_usable():
+                conn.close()
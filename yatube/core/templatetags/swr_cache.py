@@ -0,0 +1,49 @@
+import hashlib
+
+from django import template
+
+from core.cache import get_or_compute
+
+register = template.Library()
+
+
+class SWRCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = int(self.timeout.resolve(context))
+        vary_on = ":".join(str(var.resolve(context)) for var in self.vary_on)
+        key = "swr:{}:{}".format(
+            self.fragment_name, hashlib.md5(vary_on.encode()).hexdigest()
+        )
+        return get_or_compute(
+            key, lambda: self.nodelist.render(context), timeout
+        )
+
+
+@register.tag
+def swr_cache(parser, token):
+    """Кэширует фрагмент шаблона с отдачей устаревшей версии.
+
+    Синтаксис как у {% cache %}:
+    {% swr_cache 20 index_page page_obj.number %}...{% endswr_cache %}
+    После истечения срока фрагмент перерисовывает один запрос, остальные
+    в это время получают прежнюю версию (см. core.cache.get_or_compute).
+    """
+    nodelist = parser.parse(("endswr_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 2 arguments."
+        )
+    return SWRCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
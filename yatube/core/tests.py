@@ -0,0 +1,175 @@
+import multiprocessing
+import tempfile
+from collections import Counter
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import expire, get_or_compute
+from core.checks import check_shared_cache
+from core.middleware import PAGE_HITS_CACHE_KEY, QueryBudgetExceeded
+from core.warmup import hot_paths
+from posts.models import Post, User
+
+
+class GetOrComputeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_value_computed_once_while_fresh(self):
+        """Свежее значение не пересчитывается."""
+        compute = mock.Mock(return_value="value")
+        self.assertEqual(get_or_compute("key", compute, 60), "value")
+        self.assertEqual(get_or_compute("key", compute, 60), "value")
+        compute.assert_called_once()
+
+    def test_stale_value_served_while_other_refreshes(self):
+        """Пока пересчет занят другим процессом, отдается старое значение."""
+        get_or_compute("key", lambda: "old", 60)
+        expire("key")
+        cache.add("key:lock", 1)
+        self.assertEqual(get_or_compute("key", lambda: "new", 60), "old")
+        cache.delete("key:lock")
+        self.assertEqual(get_or_compute("key", lambda: "new", 60), "new")
+
+    def test_waiter_keeps_others_lock(self):
+        """Не дождавшийся запрос считает сам, но блокировку не снимает."""
+        cache.add("key:lock", "other")
+        with mock.patch("core.cache.LOCK_WAIT", 0):
+            value = get_or_compute("key", lambda: "value", 60)
+        self.assertEqual(value, "value")
+        self.assertEqual(cache.get("key:lock"), "other")
+
+
+class SWRCacheTagTests(TestCase):
+    TEMPLATE = Template(
+        "{% load swr_cache %}"
+        "{% swr_cache 20 fragment page %}{{ value }}{% endswr_cache %}"
+    )
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, value, page=1):
+        return self.TEMPLATE.render(Context({"value": value, "page": page}))
+
+    def test_fragment_cached_per_vary_on(self):
+        """Фрагмент кэшируется отдельно для каждого значения vary_on."""
+        self.assertEqual(self.render("old"), "old")
+        self.assertEqual(self.render("new"), "old")
+        self.assertEqual(self.render("new", page=2), "new")
+
+    def test_expired_fragment_rerendered_once(self):
+        """После истечения срока фрагмент перерисовывается."""
+        self.render("old")
+        with mock.patch("core.cache.time") as clock:
+            clock.time.return_value = 10 ** 10
+            self.assertEqual(self.render("new"), "new")
+        self.assertEqual(self.render("newer"), "new")
+
+
+class WarmCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="author")
+        Post.objects.create(text="Пост", author=user)
+
+    def test_hot_paths_follow_hits(self):
+        """Прогреваются самые посещаемые страницы, главная - всегда."""
+        cache.set(
+            PAGE_HITS_CACHE_KEY,
+            Counter({"/profile/author/": 5, "/groups/": 10, "/?page=2": 1}),
+        )
+        self.assertEqual(hot_paths(3), ["/", "/groups/", "/profile/author/"])
+
+    def test_command_renders_pages_into_cache(self):
+        """Прогрев из отдельного процесса виден серверу через общий кэш."""
+        with tempfile.TemporaryDirectory() as location:
+            shared = {
+                "default": {
+                    "BACKEND": (
+                        "django.core.cache.backends.filebased.FileBasedCache"
+                    ),
+                    "LOCATION": location,
+                }
+            }
+            with override_settings(CACHES=shared):
+                # Адреса для прогрева берутся из счетчиков другого процесса
+                cache.set(PAGE_HITS_CACHE_KEY, Counter({"/groups/": 3}))
+                process = multiprocessing.get_context("fork").Process(
+                    target=call_command,
+                    args=("warm_cache",),
+                    kwargs={"stdout": StringIO()},
+                )
+                process.start()
+                process.join()
+                self.assertEqual(process.exitcode, 0)
+                with self.assertNumQueries(1):
+                    self.client.get("/")
+                with self.assertNumQueries(0):
+                    self.client.get("/groups/")
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username="author")
+        Post.objects.bulk_create(
+            Post(text=f"Пост {i}", author=author) for i in range(10)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_index_fits_budget(self):
+        """Главная укладывается в бюджет даже с холодным кэшем."""
+        response = self.client.get(reverse("posts:index"))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(
+        QUERY_BUDGETS={"posts:index": {"queries": 1, "time": 1}}
+    )
+    def test_over_budget_raises(self):
+        """Превышение бюджета роняет запрос в тестах."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse("posts:index"))
+
+    @override_settings(
+        QUERY_BUDGETS={"posts:index": {"queries": 1, "time": 1}},
+        QUERY_BUDGET_RAISE=False,
+    )
+    def test_over_budget_logged(self):
+        """Без QUERY_BUDGET_RAISE превышение только пишется в лог."""
+        with self.assertLogs("core.middleware", "WARNING") as logs:
+            response = self.client.get(reverse("posts:index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("posts:index", logs.output[0])
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_deploy_requires_atomic_shared_cache(self):
+        """check --deploy не пропускает кэш без атомарного incr."""
+        for backend in (
+            "django.core.cache.backends.locmem.LocMemCache",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ):
+            with self.subTest(backend=backend):
+                caches = {"default": {"BACKEND": backend}}
+                with override_settings(CACHES=caches):
+                    self.assertEqual(
+                        [error.id for error in check_shared_cache(None)],
+                        ["core.E001"],
+                    )
+        caches = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.memcached."
+                "MemcachedCache",
+            }
+        }
+        with override_settings(CACHES=caches):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,56 @@
+import threading
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connections
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .middleware import PAGE_HITS_CACHE_KEY
+
+
+def hot_paths(limit):
+    """Самые посещаемые адреса; первая страница ленты - всегда."""
+    paths = [reverse("posts:index")]
+    hits = cache.get(PAGE_HITS_CACHE_KEY) or {}
+    for path in sorted(hits, key=hits.get, reverse=True):
+        if len(paths) >= limit:
+            break
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def warm(paths):
+    """Рендерит страницы для анонима, заполняя кэши фрагментов.
+
+    Возвращает словарь адрес -> код ответа.
+    """
+    factory = RequestFactory()
+    statuses = {}
+    for path in paths:
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        request.resolver_match = match = resolve(request.path_info)
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+        except Http404:
+            statuses[path] = 404
+        else:
+            statuses[path] = response.status_code
+    return statuses
+
+
+def _warm_and_close(paths):
+    try:
+        warm(paths)
+    finally:
+        connections.close_all()
+
+
+def warm_in_background(paths):
+    """Прогревает страницы в отдельном потоке, не задерживая ответ."""
+    threading.Thread(
+        target=_warm_and_close, args=(paths,), daemon=True
+    ).start()
@@ -1,6 +1,47 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .models import Comment, Follow, Membership, ModerationJob, Post, Group
+
+COUNT_CACHE_KEY = "admin_count:{}"
+COUNT_CACHE_TIMEOUT = 60
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор с приблизительным числом строк.
+
+    COUNT(*) по большой таблице считается не чаще раза в минуту для
+    каждого набора фильтров, остальные страницы берут число из кэша.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is None:
+            return super().count
+        key = COUNT_CACHE_KEY.format(
+            hashlib.md5(str(query).encode()).hexdigest()
+        )
+        return cache.get_or_set(
+            key, lambda: self.object_list.count(), COUNT_CACHE_TIMEOUT
+        )
+
 
-from .models import Comment, Follow, Post, Group
+class BareRawIdWidget(ForeignKeyRawIdWidget):
+    """Поле id со ссылкой выбора, без запроса за подписью объекта.
+
+    Обычный ForeignKeyRawIdWidget делает отдельный SELECT на каждую
+    строку списка изменений.
+    """
+
+    def label_and_url_for_value(self, value):
+        return "", ""
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,9 +53,40 @@ class PostAdmin(admin.ModelAdmin):
         "group",
     )
     list_editable = ("group",)
+    list_select_related = ("author", "group")
+    raw_id_fields = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    actions = ("delete_authors_posts",)
+
+    def delete_authors_posts(self, request, queryset):
+        author_ids = queryset.values_list("author_id", flat=True).distinct()
+        ModerationJob.objects.bulk_create(
+            ModerationJob(
+                action=ModerationJob.DELETE_AUTHOR_POSTS,
+                author_id=author_id,
+                total=Post.objects.filter(author_id=author_id).count(),
+            )
+            for author_id in author_ids
+        )
+        self.message_user(
+            request, f"Создано заданий модерации: {len(author_ids)}"
+        )
+
+    delete_authors_posts.short_description = (
+        "Удалить все посты авторов выбранных постов (в фоне)"
+    )
+
+    def get_changelist_form(self, request, **kwargs):
+        group = Post._meta.get_field("group")
+        kwargs.setdefault(
+            "widgets",
+            {"group": BareRawIdWidget(group.remote_field, self.admin_site)},
+        )
+        return super().get_changelist_form(request, **kwargs)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -32,18 +104,98 @@ class GroupAdmin(admin.ModelAdmin):
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("pk", "created", "text", "author")
-    search_fields = ("text", "author")
+    list_select_related = ("author",)
+    raw_id_fields = ("post", "author")
+    search_fields = ("text", "^author__username")
     list_filter = ("created",)
     empty_value_display = "-пусто-"
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    actions = ("purge_matching_comments",)
+
+    def purge_matching_comments(self, request, queryset):
+        pattern = request.GET.get("q", "").strip()
+        if not pattern:
+            self.message_user(
+                request,
+                "Сначала найдите комментарии поиском: шаблоном станет "
+                "поисковый запрос",
+            )
+            return
+        job = ModerationJob(
+            action=ModerationJob.PURGE_COMMENTS, pattern=pattern
+        )
+        job.total = job.get_queryset().count()
+        job.save()
+        self.message_user(
+            request, f"Создано задание модерации на {job.total} комментариев"
+        )
+
+    purge_matching_comments.short_description = (
+        "Удалить все комментарии с текстом из поиска (в фоне)"
+    )
 
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ("pk", "user", "author")
-    search_fields = ("author",)
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
+    search_fields = ("^author__username", "^user__username")
+    empty_value_display = "-пусто-"
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+
+class MembershipAdmin(admin.ModelAdmin):
+    list_display = ("pk", "user", "group", "joined")
+    list_select_related = ("user", "group")
+    raw_id_fields = ("user",)
+    list_filter = ("group",)
+    search_fields = ("^user__username",)
     empty_value_display = "-пусто-"
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "action",
+        "author",
+        "group",
+        "target_group",
+        "pattern",
+        "processed",
+        "total",
+        "done",
+        "created",
+    )
+    list_select_related = ("author", "group", "target_group")
+    raw_id_fields = ("author", "group", "target_group")
+    readonly_fields = ("cursor", "processed", "total", "done")
+    list_filter = ("action", "done")
+    actions = ("run_next_batch",)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.total = obj.get_queryset().count()
+        super().save_model(request, obj, form, change)
+
+    def run_next_batch(self, request, queryset):
+        for job in queryset.filter(done=False):
+            job.run_batch(settings.MODERATION_BATCH_SIZE)
+        self.message_user(
+            request,
+            "Пачка обработана. Большие задания удобнее выполнять командой "
+            "run_moderation_jobs",
+        )
+
+    run_next_batch.short_description = "Выполнить следующую пачку"
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(Membership, MembershipAdmin)
+admin.site.register(ModerationJob, ModerationJobAdmin)
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from core.hll import HyperLogLog
+from .models import Post
+
+VISITORS_CACHE_KEY = "profile_visitors:{}"
+POST_VIEWS_CACHE_KEY = "post_views:{}"
+# Сколько живет копия Post.views в кэше: ограничивает расхождение с БД,
+# если чей-то incr разминулся с чтением из БД
+POST_VIEWS_CACHE_TIMEOUT = 60 * 60
+
+
+class ViewCounters:
+    """Просмотры постов и уникальные посетители профилей.
+
+    Просмотры копятся в памяти процесса и раз в
+    VIEW_COUNTS_FLUSH_INTERVAL секунд (или при VIEW_COUNTS_FLUSH_SIZE
+    разных постах) пишутся в Post.views: по одному UPDATE на каждую
+    величину прироста, а не на каждый просмотр. Копия счетчика в общем
+    кэше увеличивается тем же сбросом. Посетители профиля
+    считаются скетчем HyperLogLog, который при сбросе сливается со
+    скетчем автора в общем кэше. Показываемые числа отстают от других
+    процессов не больше чем на интервал сброса.
+    """
+
+    def __init__(self):
+        self._views = Counter()
+        self._visitors = defaultdict(HyperLogLog)
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def post_viewed(self, post_id):
+        with self._lock:
+            self._views[post_id] += 1
+
+    def profile_visited(self, author_id, visitor):
+        with self._lock:
+            self._visitors[author_id].add(visitor)
+
+    def pending_views(self, post_id):
+        with self._lock:
+            return self._views[post_id]
+
+    def post_views(self, post_id):
+        """Просмотры поста: сброшенные в БД плюс накопленные здесь.
+
+        Сброшенное число берется из копии в общем кэше, которую flush
+        увеличивает вместе с Post.views, поэтому закэшированный пост
+        не нужно перечитывать ради счетчика.
+        """
+        key = POST_VIEWS_CACHE_KEY.format(post_id)
+        views = cache.get(key)
+        if views is None:
+            views = (
+                Post.all_objects.filter(pk=post_id)
+                .values_list("views", flat=True)
+                .first()
+                or 0
+            )
+            cache.add(key, views, POST_VIEWS_CACHE_TIMEOUT)
+        return views + self.pending_views(post_id)
+
+    def unique_visitors(self, author_id):
+        sketch = self._cached_sketch(author_id)
+        with self._lock:
+            if author_id in self._visitors:
+                sketch.merge(self._visitors[author_id])
+        return sketch.count()
+
+    def _cached_sketch(self, author_id):
+        return HyperLogLog(cache.get(VISITORS_CACHE_KEY.format(author_id)))
+
+    def flush_if_due(self):
+        if (
+            len(self._views) + len(self._visitors)
+            >= settings.VIEW_COUNTS_FLUSH_SIZE
+            or time.monotonic() - self._flushed_at
+            >= settings.VIEW_COUNTS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            views, self._views = self._views, Counter()
+            visitors, self._visitors = self._visitors, defaultdict(HyperLogLog)
+            self._flushed_at = time.monotonic()
+        by_increment = defaultdict(list)
+        for post_id, increment in views.items():
+            by_increment[increment].append(post_id)
+        with transaction.atomic():
+            for increment, post_ids in by_increment.items():
+                Post.all_objects.filter(pk__in=post_ids).update(
+                    views=F("views") + increment
+                )
+        for post_id, increment in views.items():
+            try:
+                cache.incr(POST_VIEWS_CACHE_KEY.format(post_id), increment)
+            except ValueError:
+                pass
+        for author_id, pending in visitors.items():
+            sketch = self._cached_sketch(author_id)
+            sketch.merge(pending)
+            cache.set(
+                VISITORS_CACHE_KEY.format(author_id), sketch.to_bytes(), None
+            )
+
+
+view_counters = ViewCounters()
+
+
+def visitor_id(request):
+    """Кто смотрит страницу: пользователь или адрес с браузером."""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return "anon:{}:{}".format(
+        request.META.get("REMOTE_ADDR", ""),
+        request.META.get("HTTP_USER_AGENT", ""),
+    )
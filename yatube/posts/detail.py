@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.shortcuts import get_object_or_404
+
+from .models import Post
+from .recent import recent_posts
+from .utils import comment_threads
+
+POST_DETAIL_CACHE_KEY = "post_detail:{}"
+
+
+def detail_queryset():
+    """Пост с автором, группой и числом постов автора одним запросом."""
+    author_posts = (
+        Post.objects.filter(author=OuterRef("author"))
+        .order_by()
+        .values("author")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Post.objects.select_related("author", "group").annotate(
+        author_posts_count=Subquery(author_posts, output_field=IntegerField())
+    )
+
+
+def detached_page(page):
+    """Копия страницы без queryset паджинатора, пригодная для кэша."""
+    paginator = Paginator(
+        range(page.paginator.count), page.paginator.per_page
+    )
+    return Page(list(page), page.number, paginator)
+
+
+def get_post_detail(request, post_id):
+    """Пост и страница комментариев для post_detail.
+
+    Первая страница комментариев кэшируется вместе с постом на
+    POST_DETAIL_TIMEOUT секунд. Пакет помечен версией автора из
+    recent_posts, которая меняется при любой записи его постов и смене
+    имени, а правка комментариев и пачки модерации удаляют его явно
+    (см. posts.signals). Просмотры в пакет не входят: их отдает
+    view_counters.post_views. Теплый пакет отдается без запросов к БД.
+    """
+    key = POST_DETAIL_CACHE_KEY.format(post_id)
+    first_page = request.GET.get("page") in (None, "", "1")
+    bundle = cache.get(key) if first_page else None
+    if bundle is not None and bundle["version"] == recent_posts.version(
+        bundle["post"].author_id
+    ):
+        return bundle["post"], bundle["comments"]
+    post = get_object_or_404(detail_queryset(), pk=post_id)
+    page_obj = comment_threads(request, post)
+    if first_page:
+        page_obj = detached_page(page_obj)
+        cache.set(
+            key,
+            {
+                "version": recent_posts.version(post.author_id),
+                "post": post,
+                "comments": page_obj,
+            },
+            settings.POST_DETAIL_TIMEOUT,
+        )
+    return post, page_obj
+
+
+def reset_post_details(post_ids):
+    cache.delete_many([POST_DETAIL_CACHE_KEY.format(pk) for pk in post_ids])
@@ -0,0 +1,102 @@
+import uuid
+
+from django.core.cache import cache
+
+FEED_EPOCH_CACHE_KEY = "feed_epoch"
+FEED_CURSOR_CACHE_KEY = "feed_cursor:{}"
+FEED_EVENT_CACHE_KEY = "feed_event:{}:{}"
+# Сколько последних событий просматривает один опрос и как долго они
+# хранятся
+EVENTS_LIMIT = 1000
+EVENTS_TIMEOUT = 60 * 60
+
+
+class FeedHub:
+    """События о новых постах в общем кэше.
+
+    Каждый новый пост получает номер из атомарного счетчика, а событие
+    "номер -> автор" записывается под собственным ключом один раз, так
+    что параллельные публикации не теряют друг друга. Номера живут в
+    эпохе: если счетчик пропал из кэша, начинается новая эпоха со
+    своими ключами, и старые события не выдаются за новые. Курсор
+    клиента - строка "эпоха:номер". Клиент ленты подписок коротко
+    опрашивает сервер раз в FEED_POLL_INTERVAL секунд: ответ
+    собирается одним get_many по последним событиям, без БД и без
+    ожидания.
+    """
+
+    def _state(self):
+        """Текущие эпоха и номер или (None, 0), если событий еще не было."""
+        epoch = cache.get(FEED_EPOCH_CACHE_KEY)
+        if epoch is None:
+            return None, 0
+        cursor = cache.get(FEED_CURSOR_CACHE_KEY.format(epoch))
+        if cursor is None:
+            return None, 0
+        return epoch, cursor
+
+    @property
+    def cursor(self):
+        epoch, cursor = self._state()
+        return f"{epoch}:{cursor}" if epoch else ""
+
+    def _next(self):
+        epoch = cache.get(FEED_EPOCH_CACHE_KEY)
+        if epoch is not None:
+            try:
+                return epoch, cache.incr(FEED_CURSOR_CACHE_KEY.format(epoch))
+            except ValueError:
+                pass
+        # Счетчика нет: новая эпоха, события прежней больше не читаются.
+        # Первую эпоху ставит add, чтобы параллельные публикации сошлись
+        # на одной; пропавший счетчик заменяется вместе с эпохой.
+        fresh = uuid.uuid4().hex
+        cache.set(FEED_CURSOR_CACHE_KEY.format(fresh), 0, None)
+        if epoch is None:
+            cache.add(FEED_EPOCH_CACHE_KEY, fresh, None)
+        else:
+            cache.set(FEED_EPOCH_CACHE_KEY, fresh, None)
+        epoch = cache.get(FEED_EPOCH_CACHE_KEY, fresh)
+        return epoch, cache.incr(FEED_CURSOR_CACHE_KEY.format(epoch))
+
+    def publish(self, author_id):
+        epoch, number = self._next()
+        cache.set(
+            FEED_EVENT_CACHE_KEY.format(epoch, number),
+            author_id,
+            EVENTS_TIMEOUT,
+        )
+
+    def new_posts(self, since, author_ids):
+        """Число новых постов авторов после курсора since и курсор.
+
+        Пустой курсор означает "до первого события": клиент открыл ленту,
+        когда событий не было. Курсор чужой эпохи или из будущего
+        сбрасывается на текущий.
+        """
+        epoch, cursor = self._state()
+        current = f"{epoch}:{cursor}" if epoch else ""
+        if not since and epoch:
+            since = f"{epoch}:0"
+        since_epoch, _, since_number = since.partition(":")
+        if (
+            epoch is None
+            or since_epoch != epoch
+            or not since_number.isdigit()
+            or int(since_number) > cursor
+        ):
+            return 0, current
+        first = max(int(since_number), cursor - EVENTS_LIMIT) + 1
+        events = cache.get_many(
+            [
+                FEED_EVENT_CACHE_KEY.format(epoch, number)
+                for number in range(first, cursor + 1)
+            ]
+        )
+        new = sum(
+            1 for author_id in events.values() if author_id in author_ids
+        )
+        return new, current
+
+
+feed_hub = FeedHub()
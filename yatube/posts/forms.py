@@ -1,4 +1,5 @@
 from django import forms
+from .images import EMPTY_IMAGE_DATA, process_image
 from .models import Post, Comment
 from django.contrib.auth import get_user_model
 
@@ -11,6 +12,36 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ("group", "text", "image")
 
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        if "image" in self.changed_data:
+            data = EMPTY_IMAGE_DATA
+            if post.image:
+                # Файл сохраняется заранее, чтобы знать его итоговое имя
+                if not post.image._committed:
+                    post.image.save(
+                        post.image.name, post.image.file, save=False
+                    )
+                data = self.known_image_data(
+                    post.image.name
+                ) or process_image(post.image)
+            for field, value in data.items():
+                setattr(post, field, value)
+        if commit:
+            post.save()
+            self._save_m2m()
+        return post
+
+    @staticmethod
+    def known_image_data(name):
+        """Данные картинки, которую уже обработали для другого поста."""
+        return (
+            Post.all_objects.filter(image=name)
+            .exclude(image_width=None)
+            .values(*EMPTY_IMAGE_DATA)
+            .first()
+        )
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,153 @@
+import base64
+import json
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# Ширины вариантов: телефон, планшет, колонка ленты на десктопе
+VARIANT_WIDTHS = (320, 640, 960)
+VARIANTS_DIR = "variants"
+# Качество подобрано так, чтобы артефакты не были заметны в ленте
+VARIANT_QUALITY = {"avif": 55, "webp": 75}
+# Размытое превью встраивается в страницу, поэтому оно крошечное
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 30
+# Значения производных полей Post для поста без картинки
+EMPTY_IMAGE_DATA = {
+    "image_variants": "",
+    "image_width": None,
+    "image_height": None,
+    "image_color": "",
+    "image_placeholder": "",
+}
+
+
+def variant_formats():
+    """Форматы, которые умеет кодировать установленный Pillow.
+
+    Порядок важен: браузер берет первый поддерживаемый <source>.
+    """
+    return [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+
+def variants_dir(name):
+    """Каталог вариантов картинки: posts/a.jpg -> posts/variants/a.jpg."""
+    head, tail = posixpath.split(name)
+    return posixpath.join(head, VARIANTS_DIR, tail)
+
+
+def variant_source(name):
+    """Имя исходной картинки для файла варианта или None."""
+    parts = name.split("/")
+    if len(parts) >= 3 and parts[-3] == VARIANTS_DIR:
+        return "/".join(parts[:-3] + parts[-2:-1])
+    return None
+
+
+def variant_widths(width):
+    """Ширины без растягивания: маленькая картинка остается как есть."""
+    widths = {w for w in VARIANT_WIDTHS if w < width}
+    widths.add(min(width, VARIANT_WIDTHS[-1]))
+    return sorted(widths)
+
+
+def load_image(image):
+    """Декодирует картинку с учетом EXIF-поворота в RGB или RGBA."""
+    image.open()
+    try:
+        with Image.open(image) as opened:
+            source = ImageOps.exif_transpose(opened)
+            has_alpha = (
+                "A" in source.getbands() or "transparency" in source.info
+            )
+            return source.convert("RGBA" if has_alpha else "RGB")
+    finally:
+        image.close()
+
+
+def make_variants(image, source):
+    """Сохраняет уменьшенные копии картинки в современных форматах.
+
+    Пропорции сохраняются. Уже сохраненные варианты той же картинки
+    используются повторно. Возвращает JSON-строку для Post.image_variants.
+    """
+    storage = image.storage
+    directory = variants_dir(image.name)
+    variants = []
+    for width in variant_widths(source.width):
+        height = max(1, round(source.height * width / source.width))
+        resized = None
+        for fmt in variant_formats():
+            name = posixpath.join(directory, f"{width}.{fmt}")
+            if not storage.exists(name):
+                if resized is None:
+                    resized = (
+                        source
+                        if width == source.width
+                        else source.resize((width, height), Image.LANCZOS)
+                    )
+                buffer = BytesIO()
+                resized.save(
+                    buffer, fmt.upper(), quality=VARIANT_QUALITY[fmt]
+                )
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants.append({"format": fmt, "width": width, "name": name})
+    return json.dumps(variants)
+
+
+def make_placeholder(source):
+    """Средний цвет и размытое превью в виде data URI."""
+    color = source.convert("RGB").resize((1, 1), Image.BOX).getpixel((0, 0))
+    small = source.convert("RGB")
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BOX)
+    fmt = "webp" if features.check("webp") else "png"
+    buffer = BytesIO()
+    small.save(buffer, fmt.upper(), quality=PLACEHOLDER_QUALITY)
+    return (
+        "#%02x%02x%02x" % color,
+        f"data:image/{fmt};base64,"
+        + base64.b64encode(buffer.getvalue()).decode("ascii"),
+    )
+
+
+def process_image(image):
+    """Все производные данные загруженной картинки для полей Post.
+
+    Картинка уже должна лежать в хранилище под окончательным именем:
+    варианты сохраняются рядом с ней.
+    """
+    source = load_image(image)
+    color, placeholder = make_placeholder(source)
+    return {
+        "image_variants": make_variants(image, source),
+        "image_width": source.width,
+        "image_height": source.height,
+        "image_color": color,
+        "image_placeholder": placeholder,
+    }
+
+
+def image_sources(image, variants):
+    """Пары (MIME-тип, srcset) для тегов <source> внутри <picture>."""
+    if not image or not variants:
+        return []
+    srcsets = {}
+    for variant in json.loads(variants):
+        srcsets.setdefault(variant["format"], []).append(
+            f"{image.storage.url(variant['name'])} {variant['width']}w"
+        )
+    return [
+        (f"image/{fmt}", ", ".join(srcset))
+        for fmt, srcset in srcsets.items()
+    ]
+
+
+def delete_variants(name, storage):
+    """Удаляет все варианты картинки с именем name."""
+    directory = variants_dir(name)
+    if not storage.exists(directory):
+        return
+    for filename in storage.listdir(directory)[1]:
+        storage.delete(posixpath.join(directory, filename))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Trim
+
+from posts.models import Post, User, make_preview
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет денормализованные поля постов (снимок автора и начало "
+        "текста) пачками по диапазонам id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Пауза между пачками в секундах, чтобы отдать БД запросам.",
+        )
+
+    def handle(self, *args, **options):
+        authors = User.objects.filter(pk=OuterRef("author_id"))
+        snapshot = {
+            "author_username": Subquery(
+                authors.values("username")[:1]
+            ),
+            "author_full_name": Subquery(
+                authors.annotate(
+                    full_name=Trim(
+                        Concat("first_name", Value(" "), "last_name")
+                    )
+                ).values("full_name")[:1]
+            ),
+        }
+        last = Post.all_objects.aggregate(last=Max("pk"))["last"] or 0
+        updated = 0
+        for start in range(0, last, options["batch_size"]):
+            batch = Post.all_objects.filter(
+                pk__gt=start, pk__lte=start + options["batch_size"]
+            )
+            updated += batch.update(**snapshot)
+            posts = list(batch.only("text", "text_preview"))
+            for post in posts:
+                post.text_preview = make_preview(post.text)
+            Post.all_objects.bulk_update(posts, ["text_preview"])
+            time.sleep(options["pause"])
+        self.stdout.write(f"Обновлено постов: {updated}")
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post, User
+from posts.timeline import MergedTimeline, reset_recent_posts
+from posts.utils import POST_COUNT_PER_PAGE, feed, get_following_ids
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает чтение ленты подписок одним JOIN с подписками, "
+        "подзапросом по подпискам и слиянием последних постов авторов "
+        "(MergedTimeline)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--pages", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError("Пользователь не найден")
+        author_ids = get_following_ids(user)
+        self.stdout.write(f"Подписок: {len(author_ids)}")
+        strategies = {
+            "join": lambda: feed(
+                Post.objects.filter(author__following__user=user)
+            ),
+            "подзапрос": lambda: feed(
+                Post.objects.filter(author__in=user.follower.values("author"))
+            ),
+            "merge": lambda: MergedTimeline(author_ids),
+            "merge (холодный кэш)": lambda: self.cold(author_ids),
+        }
+        for name, make in strategies.items():
+            for number in range(1, options["pages"] + 1):
+                elapsed, queries = self.measure(
+                    make, number, options["repeat"]
+                )
+                self.stdout.write(
+                    f"{name}, страница {number}: "
+                    f"{elapsed * 1000:.2f} мс, запросов: {queries}"
+                )
+
+    def cold(self, author_ids):
+        for author_id in author_ids:
+            reset_recent_posts(author_id)
+        return MergedTimeline(author_ids)
+
+    def measure(self, make, number, repeat):
+        elapsed = 0.0
+        for _ in range(repeat):
+            posts = make()
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                list(Paginator(posts, POST_COUNT_PER_PAGE).get_page(number))
+            elapsed += time.perf_counter() - started
+        return elapsed / repeat, len(captured)
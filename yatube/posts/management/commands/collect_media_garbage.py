@@ -0,0 +1,182 @@
+import heapq
+import os
+import posixpath
+import time
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+
+from posts.media import delete_unreferenced_images, find_unreferenced_images
+from posts.models import Post
+
+# Последний проверенный файл (относительно каталога картинок) для --limit
+CURSOR_CACHE_KEY = "media_garbage_cursor"
+# Сколько записей каталога scan_files держит в памяти за один проход
+SCAN_WINDOW = 10000
+
+
+def sort_key(name):
+    """Порядок обхода scan_files: в каталоге сначала файлы, потом
+    подкаталоги, и те и другие по имени."""
+    parts = name.split("/")
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+
+def modified_before(entry, deadline):
+    try:
+        return entry.stat().st_mtime < deadline
+    except FileNotFoundError:
+        return False
+
+
+def entry_key(entry):
+    return (int(entry.is_dir(follow_symlinks=False)), entry.name)
+
+
+def next_entries(path, after, size):
+    """Следующие size записей каталога после after в порядке sort_key.
+
+    Каталог читается одним проходом scandir, а в памяти держится только
+    куча из size записей, а не весь каталог.
+    """
+    try:
+        with os.scandir(path) as scan:
+            keyed = ((entry_key(entry), entry) for entry in scan)
+            return heapq.nsmallest(
+                size,
+                (item for item in keyed if after is None or item[0] > after),
+                key=itemgetter(0),
+            )
+    except FileNotFoundError:
+        # Каталог вариантов уже удален вместе с исходной картинкой
+        return []
+
+
+def scan_dir(root, parts, cursor, deadline, window):
+    after = None
+    if cursor:
+        after = cursor[0]
+        if after[0]:
+            # Курсор внутри подкаталога: сначала дочитывается он
+            yield from scan_dir(
+                root, parts + (after[1],), cursor[1:], deadline, window
+            )
+    while True:
+        entries = next_entries(os.path.join(root, *parts), after, window)
+        for key, entry in entries:
+            if key[0]:
+                yield from scan_dir(
+                    root, parts + (entry.name,), (), deadline, window
+                )
+            elif entry.is_file(follow_symlinks=False) and modified_before(
+                entry, deadline
+            ):
+                yield "/".join(parts + (entry.name,))
+        if len(entries) < window:
+            return
+        after = entries[-1][0]
+
+
+def scan_files(path, min_age, start_after="", window=SCAN_WINDOW):
+    """Лениво обходит дерево каталогов в порядке sort_key.
+
+    Каталоги не сортируются целиком: записи берутся окнами по window
+    штук, каждое окно - один проход scandir с кучей (next_entries), так
+    что в памяти только окно на каждый уровень вложенности. Возвращаются
+    пути относительно path через / строго после start_after; с курсора
+    обход продолжается внутри его каталога, а каталоги раньше него не
+    читаются. Файлы моложе min_age секунд пропускаются: пост для них
+    может быть еще не сохранен.
+    """
+    deadline = time.time() - min_age
+    cursor = sort_key(start_after) if start_after else ()
+    return scan_dir(path, (), cursor, deadline, window)
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет из MEDIA_ROOT картинки постов, на которые не ссылается "
+        "ни один Post.image, вместе с их миниатюрами sorl и вариантами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Сколько файлов проверить за запуск (0 - все). Следующий "
+            "запуск продолжит с места остановки.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Начать обход сначала, забыв сохраненную позицию.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=settings.MEDIA_GARBAGE_MIN_AGE,
+            help="Не трогать файлы моложе указанного числа секунд.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать, что будет удалено.",
+        )
+        parser.add_argument(
+            "--thumbnails",
+            action="store_true",
+            help="Также вычистить из KV-хранилища sorl ссылки на "
+            "несуществующие файлы.",
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options["dry_run"]
+        self.min_age = options["min_age"]
+        upload_to = Post._meta.get_field("image").upload_to
+        root = os.path.join(settings.MEDIA_ROOT, upload_to)
+        start_after = ""
+        if not options["restart"]:
+            start_after = cache.get(CURSOR_CACHE_KEY, "")
+        checked = found = 0
+        last = None
+        if os.path.isdir(root):
+            batch = []
+            for path in scan_files(root, options["min_age"], start_after):
+                batch.append(path)
+                checked += 1
+                if len(batch) >= options["batch_size"]:
+                    found += self.collect(upload_to, batch)
+                    batch = []
+                if checked == options["limit"]:
+                    last = path
+                    break
+            found += self.collect(upload_to, batch)
+        if last is None and not self.dry_run:
+            # Дерево пройдено до конца: следующий запуск начнет сначала
+            cache.delete(CURSOR_CACHE_KEY)
+        if options["thumbnails"] and not self.dry_run:
+            default.kvstore.cleanup()
+        self.stdout.write(
+            f"Проверено файлов: {checked}, без ссылок: {found}"
+            + (" (dry run)" if self.dry_run else "")
+            + (f", следующий запуск продолжит после {last}" if last else "")
+        )
+
+    def collect(self, upload_to, paths):
+        """Проверяет пачку и запоминает, докуда дошел обход."""
+        if not paths:
+            return 0
+        names = [posixpath.join(upload_to, path) for path in paths]
+        if self.dry_run:
+            orphans = find_unreferenced_images(names)
+            for name in sorted(orphans):
+                self.stdout.write(name)
+            return len(orphans)
+        deleted = delete_unreferenced_images(names, self.min_age)
+        cache.set(CURSOR_CACHE_KEY, paths[-1], None)
+        return deleted
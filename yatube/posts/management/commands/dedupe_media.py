@@ -0,0 +1,52 @@
+import re
+
+from django.core.management.base import BaseCommand
+
+from posts.images import EMPTY_IMAGE_DATA
+from posts.models import Post
+
+HASHED_NAME = re.compile(r"/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит картинки, загруженные до хранения по хешу, в общее "
+        "хранилище. Старые файлы потом удалит collect_media_garbage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Сколько файлов обработать за запуск (0 - все).",
+        )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field("image").storage
+        names = (
+            Post.all_objects.exclude(image="")
+            .exclude(image=None)
+            .values_list("image", flat=True)
+            .distinct()
+            .order_by("image")
+        )
+        moved = missing = 0
+        for name in names.iterator():
+            if HASHED_NAME.search(name):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name) as file:
+                new_name = storage.save(name, file)
+            # Производные данные заполнит make_image_variants
+            Post.all_objects.filter(image=name).update(
+                image=new_name, **EMPTY_IMAGE_DATA
+            )
+            moved += 1
+            if moved == options["limit"]:
+                break
+        self.stdout.write(
+            f"Перенесено файлов: {moved}, не найдено: {missing}"
+        )
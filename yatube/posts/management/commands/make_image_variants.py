@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts.images import process_image
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает варианты, размеры и заглушки картинок для постов, "
+        "у которых их еще нет."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=0,
+            help="Сколько постов обработать за запуск (0 - все).",
+        )
+
+    def handle(self, *args, **options):
+        posts = (
+            Post.all_objects.exclude(image="")
+            .exclude(image=None)
+            .filter(Q(image_variants="") | Q(image_width=None))
+            .only("pk", "image")
+            .order_by("pk")
+        )
+        if options["limit"]:
+            posts = posts[: options["limit"]]
+        done = failed = 0
+        for post in posts.iterator():
+            try:
+                data = process_image(post.image)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f"{post.image.name}: {error}")
+                continue
+            Post.all_objects.filter(pk=post.pk).update(**data)
+            done += 1
+        self.stdout.write(f"Обработано постов: {done}, с ошибками: {failed}")
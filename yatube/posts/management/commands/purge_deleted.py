@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Q
+
+from posts.media import delete_unreferenced_images
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Окончательно удаляет скрытые посты и комментарии небольшими "
+        "пачками вместе с файлами картинок и их миниатюрами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=0,
+            help="Сколько пачек обработать за запуск (0 - все).",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Пауза между пачками в секундах, чтобы отдать БД запросам.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=None,
+            help="Не удалять картинки моложе указанного числа секунд "
+            "(по умолчанию MEDIA_GARBAGE_MIN_AGE).",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.pause = options["pause"]
+        self.min_age = options["min_age"]
+        batches = options["max_batches"] or None
+        comments, batches = self.purge(self.comments_batch, batches)
+        posts, batches = self.purge(self.posts_batch, batches)
+        self.stdout.write(
+            f"Удалено комментариев: {comments}, постов: {posts}"
+        )
+
+    def purge(self, delete_batch, batches):
+        total = 0
+        while batches is None or batches > 0:
+            deleted = delete_batch()
+            total += deleted
+            if batches is not None:
+                batches -= 1
+            if deleted < self.batch_size:
+                break
+            time.sleep(self.pause)
+        return total, batches
+
+    def comments_batch(self):
+        """Удаляет пачку комментариев, начиная с самых глубоких.
+
+        Ответы удаляются раньше родителей, поэтому пачка не тянет за
+        собой поддеревья. Удаленный комментарий с живыми ответами
+        остается, пока живы ответы.
+        """
+        live_replies = Comment.all_objects.filter(
+            parent=OuterRef("pk"), is_deleted=False
+        )
+        ids = list(
+            Comment.all_objects.annotate(has_live_replies=Exists(live_replies))
+            .filter(
+                Q(post__is_deleted=True)
+                | Q(is_deleted=True, has_live_replies=False)
+            )
+            .order_by("-depth")
+            .values_list("pk", flat=True)[: self.batch_size]
+        )
+        Comment.all_objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+    def posts_batch(self):
+        posts = list(
+            Post.all_objects.filter(is_deleted=True).values_list(
+                "pk", "image"
+            )[: self.batch_size]
+        )
+        Post.all_objects.filter(pk__in=[pk for pk, _ in posts]).delete()
+        delete_unreferenced_images(
+            (image for _, image in posts), self.min_age
+        )
+        return len(posts)
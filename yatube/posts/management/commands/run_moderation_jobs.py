@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import ModerationJob
+
+
+class Command(BaseCommand):
+    help = "Выполняет незавершенные задания модерации пачками."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.MODERATION_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Пауза между пачками в секундах, чтобы отдать БД запросам.",
+        )
+
+    def handle(self, *args, **options):
+        for job in ModerationJob.objects.filter(done=False).order_by("pk"):
+            while not job.done:
+                job.run_batch(options["batch_size"])
+                self.stdout.write(str(job))
+                time.sleep(options["pause"])
@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.conf import settings
+from sorl.thumbnail import delete
+from sorl.thumbnail.images import ImageFile
+
+from .images import delete_variants, variant_source
+from .models import Post
+
+
+def find_unreferenced_images(names):
+    """Возвращает имена файлов, на которые не ссылается ни один пост.
+
+    Учитываются и скрытые посты: их файлы удалит purge_deleted. Вариант
+    картинки считается используемым, пока используется его исходник.
+    """
+    owners = {
+        name: variant_source(name) or name for name in names if name
+    }
+    referenced = set(
+        Post.all_objects.filter(image__in=set(owners.values())).values_list(
+            "image", flat=True
+        )
+    )
+    return {name for name, owner in owners.items() if owner not in referenced}
+
+
+def modified_since(storage, name, deadline):
+    try:
+        return os.path.getmtime(storage.path(name)) >= deadline
+    except FileNotFoundError:
+        return False
+
+
+def delete_unreferenced_images(names, min_age=None):
+    """Удаляет файлы картинок вместе с миниатюрами sorl и вариантами.
+
+    Файлы, на которые еще ссылается хоть один пост (в том числе скрытый),
+    остаются на месте. Не трогаются и картинки, исходник которых менялся
+    за последние min_age секунд (по умолчанию MEDIA_GARBAGE_MIN_AGE):
+    ContentAddressedStorage обновляет mtime при повторной загрузке, и
+    пост с этим файлом может быть еще не сохранен. Их подберет следующий
+    collect_media_garbage. Возвращает число удаленных файлов.
+    """
+    if min_age is None:
+        min_age = settings.MEDIA_GARBAGE_MIN_AGE
+    deadline = time.time() - min_age
+    storage = Post._meta.get_field("image").storage
+    orphans = {
+        name
+        for name in find_unreferenced_images(names)
+        if not modified_since(
+            storage, variant_source(name) or name, deadline
+        )
+    }
+    for name in orphans:
+        if variant_source(name):
+            storage.delete(name)
+            continue
+        delete(ImageFile(name, storage))
+        delete_variants(name, storage)
+    return len(orphans)
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.19 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20230303_1837'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_deleted',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Удален'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_deleted',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Удален'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.19 on 2026-10-19 09:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('delete_author_posts', 'Удалить все посты автора'), ('reassign_group', 'Перенести посты в другую группу'), ('purge_comments', 'Удалить комментарии по шаблону')], max_length=32, verbose_name='Действие')),
+                ('pattern', models.CharField(blank=True, help_text='Подстрока, без учета регистра', max_length=200, verbose_name='Шаблон текста')),
+                ('cursor', models.PositiveIntegerField(default=0, verbose_name='Последний pk')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего')),
+                ('done', models.BooleanField(default=False, verbose_name='Завершено')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Группа')),
+                ('target_group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Новая группа')),
+            ],
+            options={
+                'verbose_name': 'Задание модерации',
+                'verbose_name_plural': 'Задания модерации',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.19 on 2026-10-19 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_paths(apps, schema_editor):
+    """Существующие комментарии становятся корнями своих веток."""
+    Comment = apps.get_model('posts', 'Comment')
+    for pk in Comment.objects.filter(path='').values_list('pk', flat=True):
+        Comment.objects.filter(pk=pk).update(path=f'{pk:010d}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_moderationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Глубина'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, help_text='id предков и самого комментария через /', max_length=55, verbose_name='Путь в дереве'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ответов в ветке'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
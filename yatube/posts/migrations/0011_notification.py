@@ -0,0 +1,37 @@
+# Generated by Django 2.2.19 on 2026-10-19 09:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_threaded_comments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('comment', 'Комментарий к посту'), ('follow', 'Новый подписчик')], max_length=16, verbose_name='Событие')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Сколько раз')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Обновлено')),
+                ('last_actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-updated',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-updated'], name='posts_notif_recipie_340f0d_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.19 on 2026-10-19 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Варианты картинки'),
+        ),
+    ]
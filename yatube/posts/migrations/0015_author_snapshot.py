@@ -0,0 +1,23 @@
+# Generated by Django 2.2.19 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_image_placeholders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='author_full_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Имя автора'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='author_username',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150, verbose_name='Логин автора'),
+        ),
+    ]
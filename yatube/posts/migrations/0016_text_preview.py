@@ -0,0 +1,18 @@
+# Generated by Django 2.2.19 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_author_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_preview',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Начало текста'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:20
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Trim
+
+
+def fill_author_snapshot(apps, schema_editor):
+    """Снимок автора для постов, созданных до его появления.
+
+    Без него карточка ленты читает User отдельным запросом.
+    """
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    authors = User.objects.filter(pk=OuterRef('author_id'))
+    Post.objects.filter(author_username='').update(
+        author_username=Subquery(authors.values('username')[:1]),
+        author_full_name=Subquery(
+            authors.annotate(
+                full_name=Trim(Concat('first_name', Value(' '), 'last_name'))
+            ).values('full_name')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0020_comment_parent_set_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_author_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:25
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+# Копия posts.models.make_preview на момент миграции: миграция не должна
+# зависеть от того, как модель режет текст потом
+TEXT_PREVIEW_LENGTH = 500
+
+
+def make_preview(text):
+    if len(text) <= TEXT_PREVIEW_LENGTH:
+        return text
+    return text[:TEXT_PREVIEW_LENGTH - 1] + '…'
+
+
+def fill_text_preview(apps, schema_editor):
+    """Начало текста для постов, созданных до его появления.
+
+    Без него карточки старых постов в лентах выходят пустыми.
+    """
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.filter(text_preview='').exclude(text='')
+    batch = []
+    for post in posts.only('text').iterator(chunk_size=BATCH_SIZE):
+        post.text_preview = make_preview(post.text)
+        batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['text_preview'])
+            batch = []
+    Post.objects.bulk_update(batch, ['text_preview'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_backfill_author_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_text_preview, migrations.RunPython.noop),
+    ]
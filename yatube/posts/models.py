@@ -1,9 +1,54 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .images import image_sources
+from .storage import post_image_storage
 
 User = get_user_model()
 
 LENGHT = 15
+# Глубина дерева комментариев: ответы глубже прикрепляются к родителю
+MAX_COMMENT_DEPTH = 5
+PATH_STEP = 10
+# Сколько символов текста поста показывать в лентах
+TEXT_PREVIEW_LENGTH = 500
+
+
+def make_preview(text):
+    """Начало текста: не длиннее TEXT_PREVIEW_LENGTH вместе с многоточием."""
+    if len(text) <= TEXT_PREVIEW_LENGTH:
+        return text
+    return text[: TEXT_PREVIEW_LENGTH - 1] + "…"
+
+
+class PublishedManager(models.Manager):
+    """Менеджер, скрывающий удаленные записи."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class PostManager(models.Manager):
+    """Менеджер постов: bulk_create заполняет те же поля, что и save()."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        missing = {
+            post.author_id
+            for post in objs
+            if not post.author_username and not Post.author.is_cached(post)
+        }
+        authors = User.objects.in_bulk(missing) if missing else {}
+        for post in objs:
+            post.fill_denormalized(authors.get(post.author_id))
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class PublishedPostManager(PostManager, PublishedManager):
+    pass
 
 
 class Group(models.Model):
@@ -17,15 +62,56 @@ class Group(models.Model):
 
 class Post(models.Model):
     text = models.TextField("Текст поста", help_text="Текст нового поста")
+    # Начало текста для лент: полный текст читает только страница поста
+    text_preview = models.TextField(
+        "Начало текста", blank=True, default="", editable=False
+    )
     pub_date = models.DateTimeField(
         "Дата публикации", auto_now_add=True, db_index=True
     )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="posts"
     )
+    # Снимок данных автора для карточек ленты, чтобы не соединять
+    # с auth_user. Синхронизируется сигналом при сохранении User.
+    author_username = models.CharField(
+        "Логин автора", max_length=150, blank=True, default="", editable=False
+    )
+    author_full_name = models.CharField(
+        "Имя автора", max_length=255, blank=True, default="", editable=False
+    )
     image = models.ImageField(
-        "Картинка", upload_to="posts/", blank=True, null=True
+        "Картинка",
+        upload_to="posts/",
+        storage=post_image_storage,
+        blank=True,
+        null=True,
+    )
+    # JSON со списком уменьшенных копий картинки, см. posts.images
+    image_variants = models.TextField(
+        "Варианты картинки", blank=True, default="", editable=False
+    )
+    # Размеры и заглушка картинки: разметка ленты не читает файлы
+    image_width = models.PositiveIntegerField(
+        "Ширина картинки", null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        "Высота картинки", null=True, blank=True, editable=False
     )
+    image_color = models.CharField(
+        "Цвет картинки", max_length=7, blank=True, default="", editable=False
+    )
+    image_placeholder = models.TextField(
+        "Превью картинки", blank=True, default="", editable=False
+    )
+    # Пишется пачками из posts.counters, а не на каждый просмотр
+    views = models.PositiveIntegerField(
+        "Просмотры", default=0, editable=False
+    )
+    is_deleted = models.BooleanField("Удален", default=False, db_index=True)
+
+    objects = PublishedPostManager()
+    all_objects = PostManager()
 
     class Meta:
         ordering = ("-pub_date",)
@@ -35,6 +121,48 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:LENGHT]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Прежние группа и автор нужны, чтобы сбросить их ленты после
+        # переноса, а при смене автора - еще и обновить снимок
+        post.loaded_group_id = post.__dict__.get("group_id")
+        post.loaded_author_id = post.__dict__.get("author_id")
+        return post
+
+    def fill_denormalized(self, author=None):
+        """Заполняет начало текста и снимок автора, если его еще нет или
+        автор поста сменился."""
+        self.text_preview = make_preview(self.text)
+        author_changed = self.author_id != getattr(
+            self, "loaded_author_id", self.author_id
+        )
+        if self.author_id and (not self.author_username or author_changed):
+            author = author or self.author
+            self.author_username = author.username
+            self.author_full_name = author.get_full_name()
+
+    def save(self, *args, **kwargs):
+        self.fill_denormalized()
+        super().save(*args, **kwargs)
+        self.loaded_author_id = self.author_id
+
+    @property
+    def author_name(self):
+        """Логин автора; без снимка - из связанного User."""
+        return self.author_username or self.author.username
+
+    @property
+    def author_display_name(self):
+        """Полное имя автора; без снимка - из связанного User."""
+        if self.author_username:
+            return self.author_full_name
+        return self.author.get_full_name()
+
+    @property
+    def image_sources(self):
+        return image_sources(self.image, self.image_variants)
+
     group = models.ForeignKey(
         Group,
         verbose_name="Группа",
@@ -47,6 +175,12 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-pub_date"]
+        # Последние посты автора или группы: профиль, страница группы
+        # и слияние лент подписок и групп
+        indexes = [
+            models.Index(fields=["author", "-pub_date"]),
+            models.Index(fields=["group", "-pub_date"]),
+        ]
 
         def __str__(self):
             return self.text[:LENGHT]
@@ -67,6 +201,55 @@ class Comment(models.Model):
         auto_now_add=True,
         help_text="Дата публикации",
     )
+    is_deleted = models.BooleanField("Удален", default=False, db_index=True)
+    parent = models.ForeignKey(
+        "self",
+        verbose_name="Ответ на",
+        blank=True,
+        null=True,
+        # purge_deleted удаляет ветки от листьев к корню: каскад затянул
+        # бы в одну пачку все поддерево
+        on_delete=models.SET_NULL,
+        related_name="replies",
+    )
+    path = models.CharField(
+        "Путь в дереве",
+        max_length=(PATH_STEP + 1) * MAX_COMMENT_DEPTH,
+        blank=True,
+        help_text="id предков и самого комментария через /",
+    )
+    depth = models.PositiveSmallIntegerField("Глубина", default=0)
+    replies_count = models.PositiveIntegerField("Ответов в ветке", default=0)
+
+    objects = PublishedManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["post", "path"])]
+
+    def save(self, *args, **kwargs):
+        """Материализует путь в дереве и обновляет счетчики предков.
+
+        Путь - id предков, дополненные нулями до PATH_STEP знаков, поэтому
+        сортировка по path выдает ветку целиком в порядке обхода, а любое
+        поддерево - это диапазон индекса (post, path).
+        """
+        is_new = self.pk is None
+        if is_new and self.parent_id:
+            if self.parent.depth >= MAX_COMMENT_DEPTH - 1:
+                self.parent = self.parent.parent
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if not is_new:
+            return
+        prefix = f"{self.parent.path}/" if self.parent_id else ""
+        self.path = f"{prefix}{self.pk:0{PATH_STEP}d}"
+        Comment.all_objects.filter(pk=self.pk).update(path=self.path)
+        if self.parent_id:
+            ancestors = [int(pk) for pk in self.parent.path.split("/")]
+            Comment.all_objects.filter(pk__in=ancestors).update(
+                replies_count=F("replies_count") + 1
+            )
 
 
 class Follow(models.Model):
@@ -86,3 +269,175 @@ class Follow(models.Model):
 
     def __str__(self):
         return f"Пользователь:{self.user} подписался на {self.author}"
+
+
+class Membership(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="memberships"
+    )
+    group = models.ForeignKey(
+        Group, on_delete=models.CASCADE, related_name="memberships"
+    )
+    joined = models.DateTimeField("Дата вступления", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Участие в группе"
+        verbose_name_plural = "Участие в группах"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "group"], name="user_group"
+            )
+        ]
+
+    def __str__(self):
+        return f"Пользователь:{self.user} вступил в {self.group}"
+
+
+class Notification(models.Model):
+    """Событие для автора; повторы копятся в одной строке в count."""
+
+    COMMENT = "comment"
+    FOLLOW = "follow"
+    VERBS = (
+        (COMMENT, "Комментарий к посту"),
+        (FOLLOW, "Новый подписчик"),
+    )
+
+    recipient = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="notifications"
+    )
+    verb = models.CharField("Событие", max_length=16, choices=VERBS)
+    post = models.ForeignKey(
+        Post,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    last_actor = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    count = models.PositiveIntegerField("Сколько раз", default=1)
+    is_read = models.BooleanField("Прочитано", default=False)
+    updated = models.DateTimeField("Обновлено", default=timezone.now)
+
+    class Meta:
+        ordering = ("-updated",)
+        indexes = [models.Index(fields=["recipient", "is_read", "-updated"])]
+
+
+class ModerationJob(models.Model):
+    """Массовая модерация, выполняемая пачками по курсору pk.
+
+    Задание хранит фильтр, а не список id, поэтому его можно создать
+    на сотни тысяч строк и продолжить с места остановки.
+    """
+
+    DELETE_AUTHOR_POSTS = "delete_author_posts"
+    REASSIGN_GROUP = "reassign_group"
+    PURGE_COMMENTS = "purge_comments"
+    ACTIONS = (
+        (DELETE_AUTHOR_POSTS, "Удалить все посты автора"),
+        (REASSIGN_GROUP, "Перенести посты в другую группу"),
+        (PURGE_COMMENTS, "Удалить комментарии по шаблону"),
+    )
+
+    action = models.CharField("Действие", max_length=32, choices=ACTIONS)
+    author = models.ForeignKey(
+        User,
+        verbose_name="Автор",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    group = models.ForeignKey(
+        Group,
+        verbose_name="Группа",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    target_group = models.ForeignKey(
+        Group,
+        verbose_name="Новая группа",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    pattern = models.CharField(
+        "Шаблон текста",
+        max_length=200,
+        blank=True,
+        help_text="Подстрока, без учета регистра",
+    )
+    cursor = models.PositiveIntegerField("Последний pk", default=0)
+    processed = models.PositiveIntegerField("Обработано", default=0)
+    total = models.PositiveIntegerField("Всего", default=0)
+    done = models.BooleanField("Завершено", default=False)
+    created = models.DateTimeField("Создано", auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created",)
+        verbose_name = "Задание модерации"
+        verbose_name_plural = "Задания модерации"
+
+    def __str__(self):
+        return f"{self.get_action_display()}: {self.processed}/{self.total}"
+
+    def clean(self):
+        required = {
+            self.DELETE_AUTHOR_POSTS: ("author_id",),
+            self.REASSIGN_GROUP: ("group_id", "target_group_id"),
+            self.PURGE_COMMENTS: ("pattern",),
+        }
+        errors = {
+            field.replace("_id", ""): "Обязательное поле для этого действия"
+            for field in required.get(self.action, ())
+            if not getattr(self, field)
+        }
+        if errors:
+            raise ValidationError(errors)
+
+    def get_queryset(self):
+        if self.action == self.PURGE_COMMENTS:
+            queryset = Comment.objects.filter(text__icontains=self.pattern)
+        else:
+            queryset = Post.objects.all()
+            if self.group_id:
+                queryset = queryset.filter(group_id=self.group_id)
+        if self.author_id:
+            queryset = queryset.filter(author_id=self.author_id)
+        return queryset
+
+    def run_batch(self, size):
+        """Обрабатывает следующую пачку и сохраняет прогресс.
+
+        Удаление - мягкое, строки окончательно убирает purge_deleted.
+        """
+        ids = list(
+            self.get_queryset()
+            .filter(pk__gt=self.cursor)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:size]
+        )
+        batch = self.get_queryset().model.objects.filter(pk__in=ids)
+        if self.action == self.PURGE_COMMENTS:
+            # Для сброса кэша страниц затронутых постов (см. posts.signals)
+            self.batch_post_ids = set(
+                batch.values_list("post_id", flat=True)
+            )
+        else:
+            self.batch_post_ids = set(ids)
+        if self.action == self.REASSIGN_GROUP:
+            batch.update(group_id=self.target_group_id)
+        else:
+            batch.update(is_deleted=True)
+        if ids:
+            self.cursor = ids[-1]
+        self.processed += len(ids)
+        self.done = len(ids) < size
+        self.save(update_fields=["cursor", "processed", "done"])
+        return len(ids)
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Notification
+
+UNREAD_CACHE_KEY = "unread_notifications:{}"
+UNREAD_CACHE_TIMEOUT = 60 * 5
+
+
+class NotificationBuffer:
+    """Буфер событий, который пишет уведомления пачками.
+
+    События копятся в памяти процесса, одинаковые (получатель, событие,
+    пост) сразу схлопываются в один счетчик. Сброс в БД происходит при
+    накоплении NOTIFICATIONS_FLUSH_SIZE ключей или не позже чем через
+    NOTIFICATIONS_FLUSH_INTERVAL секунд после первого события - по
+    таймеру, даже если процесс больше не получает запросов: непрочитанные
+    уведомления с тем же ключом увеличиваются, для остальных - один
+    bulk_create. Счетчик непрочитанных в кэше растет только после
+    записи, поэтому он не опережает БД.
+    """
+
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self._timer = None
+
+    def add(self, recipient_id, verb, actor_id, post_id=None):
+        if recipient_id == actor_id:
+            return
+        with self._lock:
+            event = self._events.setdefault(
+                (recipient_id, verb, post_id), [0, actor_id]
+            )
+            event[0] += 1
+            event[1] = actor_id
+            self._schedule()
+        self.flush_if_due()
+
+    def _schedule(self):
+        interval = settings.NOTIFICATIONS_FLUSH_INTERVAL
+        if self._timer is None and interval > 0:
+            self._timer = threading.Timer(interval, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def flush_if_due(self):
+        if (
+            len(self._events) >= settings.NOTIFICATIONS_FLUSH_SIZE
+            or time.monotonic() - self._flushed_at
+            >= settings.NOTIFICATIONS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, {}
+            self._flushed_at = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events:
+            return
+        now = timezone.now()
+        unread = {
+            (item.recipient_id, item.verb, item.post_id): item.pk
+            for item in Notification.objects.filter(
+                recipient_id__in={key[0] for key in events}, is_read=False
+            ).only("recipient_id", "verb", "post_id")
+        }
+        new = []
+        added = Counter()
+        with transaction.atomic():
+            for key, (count, actor_id) in events.items():
+                added[key[0]] += count
+                if key in unread:
+                    Notification.objects.filter(pk=unread[key]).update(
+                        count=F("count") + count,
+                        last_actor_id=actor_id,
+                        updated=now,
+                    )
+                else:
+                    recipient_id, verb, post_id = key
+                    new.append(
+                        Notification(
+                            recipient_id=recipient_id,
+                            verb=verb,
+                            post_id=post_id,
+                            last_actor_id=actor_id,
+                            count=count,
+                            updated=now,
+                        )
+                    )
+            Notification.objects.bulk_create(new)
+        for recipient_id, count in added.items():
+            try:
+                cache.incr(UNREAD_CACHE_KEY.format(recipient_id), count)
+            except ValueError:
+                # Счетчика нет в кэше: его посчитают из БД при чтении
+                pass
+
+
+notification_buffer = NotificationBuffer()
+
+
+def get_unread_count(user):
+    """Число непрочитанных событий; при теплом кэше - без запросов."""
+    if not user.is_authenticated:
+        return 0
+    key = UNREAD_CACHE_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = (
+            Notification.objects.filter(
+                recipient=user, is_read=False
+            ).aggregate(total=Sum("count"))["total"]
+            or 0
+        )
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def mark_all_read(user):
+    """Отмечает уведомления прочитанными.
+
+    Счетчик в кэше удаляется, а не обнуляется: события, которые другие
+    процессы запишут из своих буферов позже, попадут в пересчет из БД.
+    """
+    Notification.objects.filter(recipient=user, is_read=False).update(
+        is_read=True
+    )
+    cache.delete(UNREAD_CACHE_KEY.format(user.pk))
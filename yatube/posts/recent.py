@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Post
+from .utils import FEED_FIELDS, feed
+
+RECENT_VERSION_CACHE_KEY = "recent_version:{}"
+# Примерный вес карточки без строковых полей: объект модели и группа
+CARD_OVERHEAD = 1024
+
+Ring = namedtuple("Ring", "version expires count posts size")
+
+
+def card_size(post):
+    return CARD_OVERHEAD + sum(
+        len(getattr(post, field) or "")
+        for field in FEED_FIELDS
+        if isinstance(getattr(post, field, None), str)
+    )
+
+
+class RecentPostsCache:
+    """Последние посты авторов с данными карточек в памяти процесса.
+
+    Для каждого автора хранится до RECENT_POSTS_PER_AUTHOR постов в
+    порядке ленты и общее число его постов. Авторы вытесняются по LRU,
+    когда суммарный примерный размер карточек превышает
+    RECENT_POSTS_MEMORY байт. Создание, правка и удаление поста
+    обновляют список на месте. Согласованность между процессами держит
+    номер версии автора в общем кэше: чужой список с устаревшей версией
+    перечитывается из БД, а RECENT_POSTS_TIMEOUT ограничивает срок
+    жизни списка, если посты менялись через update().
+    """
+
+    def __init__(self):
+        self._rings = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def version(self, author_id):
+        return cache.get(RECENT_VERSION_CACHE_KEY.format(author_id), 0)
+
+    def _bump(self, author_id):
+        key = RECENT_VERSION_CACHE_KEY.format(author_id)
+        cache.add(key, 0, None)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            return None
+
+    def _store(self, author_id, ring):
+        with self._lock:
+            old = self._rings.pop(author_id, None)
+            if old is not None:
+                self._size -= old.size
+            if ring is None:
+                return
+            self._rings[author_id] = ring
+            self._size += ring.size
+            while self._size > settings.RECENT_POSTS_MEMORY and self._rings:
+                _, evicted = self._rings.popitem(last=False)
+                self._size -= evicted.size
+
+    def _build(self, version, count, posts):
+        return Ring(
+            version,
+            time.monotonic() + settings.RECENT_POSTS_TIMEOUT,
+            count,
+            tuple(posts),
+            sum(card_size(post) for post in posts),
+        )
+
+    def _load(self, author_id, version):
+        posts = list(
+            feed(Post.objects.filter(author_id=author_id))[
+                : settings.RECENT_POSTS_PER_AUTHOR
+            ]
+        )
+        if len(posts) < settings.RECENT_POSTS_PER_AUTHOR:
+            count = len(posts)
+        else:
+            count = Post.objects.filter(author_id=author_id).count()
+        ring = self._build(version, count, posts)
+        self._store(author_id, ring)
+        return ring
+
+    def get(self, author_id):
+        """Список автора: из памяти, если он свежий, иначе из БД."""
+        version = self.version(author_id)
+        with self._lock:
+            ring = self._rings.get(author_id)
+            if ring is not None:
+                self._rings.move_to_end(author_id)
+        if (
+            ring is not None
+            and ring.version == version
+            and ring.expires > time.monotonic()
+        ):
+            return ring
+        return self._load(author_id, version)
+
+    def post_saved(self, post, created):
+        """Вставляет, заменяет или убирает пост в списке его автора."""
+        self._apply(post.author_id, post.pk, created, post.is_deleted)
+
+    def post_deleted(self, post):
+        self._apply(post.author_id, post.pk, False, True)
+
+    def invalidate(self, author_id):
+        self._bump(author_id)
+        self._store(author_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._rings.clear()
+            self._size = 0
+
+    def _apply(self, author_id, post_pk, created, removed):
+        with self._lock:
+            ring = self._rings.get(author_id)
+        version = self._bump(author_id)
+        # Список обновляется на месте, только если до этой записи он был
+        # актуален: иначе в нем нет чужих изменений.
+        if ring is None or version is None or ring.version != version - 1:
+            self._store(author_id, None)
+            return
+        posts = [post for post in ring.posts if post.pk != post_pk]
+        found = len(posts) < len(ring.posts)
+        count = ring.count
+        if not found and not (created and not removed):
+            # Старый пост за пределами списка: проще перечитать
+            self._store(author_id, None)
+            return
+        if removed:
+            # Список остается точным началом ленты автора, только короче
+            count -= 1
+        else:
+            card = feed(Post.objects.filter(pk=post_pk)).first()
+            if card is None:
+                self._store(author_id, None)
+                return
+            posts.append(card)
+            posts.sort(key=lambda post: post.pub_date, reverse=True)
+            count += created
+            del posts[settings.RECENT_POSTS_PER_AUTHOR:]
+        self._store(author_id, self._build(version, count, posts))
+
+
+recent_posts = RecentPostsCache()
+
+
+class AuthorTimeline:
+    """Посты автора для Paginator.
+
+    Первые страницы берутся из recent_posts без запросов к БД, дальние
+    читаются обычным запросом.
+    """
+
+    def __init__(self, author_id):
+        self.author_id = author_id
+        self.ring = recent_posts.get(author_id)
+
+    def count(self):
+        return self.ring.count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if index.stop <= len(self.ring.posts) or (
+            len(self.ring.posts) == self.ring.count
+        ):
+            return list(self.ring.posts[index])
+        return list(
+            feed(Post.objects.filter(author_id=self.author_id))[index]
+        )
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.warmup import hot_paths, warm_in_background
+from .counters import view_counters
+from .detail import reset_post_details
+from .models import Comment, Follow, Membership, ModerationJob, Post, User
+from .notifications import notification_buffer
+from .recent import recent_posts
+from .timeline import reset_recent_posts
+from .utils import (
+    reset_following_ids,
+    reset_group_directory,
+    reset_group_ids,
+)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    reset_group_directory()
+    old_author_id = getattr(instance, "loaded_author_id", None)
+    for author_id in {instance.author_id, old_author_id} - {None}:
+        reset_recent_posts(author_id)
+    if old_author_id not in (None, instance.author_id):
+        recent_posts.invalidate(old_author_id)
+    reset_post_details([instance.pk])
+    old_group_id = getattr(instance, "loaded_group_id", None)
+    for group_id in {instance.group_id, old_group_id} - {None}:
+        reset_recent_posts(group_id, "group_id")
+    if settings.CACHE_WARM_AFTER_INVALIDATE:
+        transaction.on_commit(
+            lambda: warm_in_background(hot_paths(settings.CACHE_WARM_TOP))
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    recent_posts.post_saved(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    recent_posts.post_deleted(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    reset_post_details([instance.post_id])
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Обновляет снимок данных автора в его постах."""
+    if created or (
+        update_fields is not None
+        and not {"username", "first_name", "last_name"} & set(update_fields)
+    ):
+        return
+    full_name = instance.get_full_name()
+    if Post.all_objects.filter(author=instance).exclude(
+        author_username=instance.username, author_full_name=full_name
+    ).update(author_username=instance.username, author_full_name=full_name):
+        recent_posts.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    """Подписки меняются и из админки, поэтому кэш сбрасывается здесь."""
+    reset_following_ids(instance.user_id)
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def membership_changed(sender, instance, **kwargs):
+    reset_group_ids(instance.user_id)
+
+
+@receiver(post_save, sender=ModerationJob)
+def moderation_batch_done(sender, instance, **kwargs):
+    """Пачки задания меняют посты через update(), минуя сигналы Post."""
+    reset_group_directory()
+    reset_post_details(getattr(instance, "batch_post_ids", ()))
+    if instance.author_id:
+        reset_recent_posts(instance.author_id)
+        recent_posts.invalidate(instance.author_id)
+    for group_id in (instance.group_id, instance.target_group_id):
+        if group_id:
+            reset_recent_posts(group_id, "group_id")
+
+
+@receiver(request_finished)
+def flush_notifications(sender, **kwargs):
+    """Сбрасывает накопленные уведомления, если подошел срок."""
+    notification_buffer.flush_if_due()
+
+
+@receiver(request_finished)
+def flush_view_counters(sender, **kwargs):
+    view_counters.flush_if_due()
@@ -0,0 +1,67 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from .images import variant_source
+
+# Права файла, если FILE_UPLOAD_PERMISSIONS не задан: mkstemp создает 0600
+DEFAULT_PERMISSIONS = 0o644
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит каждую картинку один раз под хешем ее содержимого.
+
+    При загрузке содержимое пишется во временный файл и одновременно
+    хешируется, затем файл переносится в <каталог>/<ab>/<sha256>.<ext>.
+    Если такой файл уже есть, копия выбрасывается, а у существующего
+    обновляется mtime, чтобы collect_media_garbage не удалил его до
+    сохранения поста. Ссылки на файл считаются по Post.image, так что
+    файл удаляется, только когда на него не ссылается ни один пост.
+    Миниатюры sorl и варианты картинки привязаны к имени файла и потому
+    общие для всех постов с одинаковой картинкой.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if variant_source(name):
+            return super().get_available_name(name, max_length)
+        return name
+
+    def _save(self, name, content):
+        if variant_source(name):
+            return super()._save(name, content)
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.path(directory), prefix=".upload-"
+        )
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            sha = digest.hexdigest()
+            name = posixpath.join(directory, sha[:2], sha + extension)
+            path = self.path(name)
+            if os.path.exists(path):
+                os.utime(path)
+                return name
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(
+                temp_path, self.file_permissions_mode or DEFAULT_PERMISSIONS
+            )
+            os.replace(temp_path, path)
+            temp_path = None
+            return name
+        finally:
+            if temp_path is not None:
+                os.remove(temp_path)
+
+
+post_image_storage = ContentAddressedStorage()
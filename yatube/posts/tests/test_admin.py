@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        for i in range(5):
+            author = User.objects.create_user(username=f"author_{i}")
+            post = Post.objects.create(
+                text=f"Пост {i}", author=author, group=cls.group
+            )
+            Comment.objects.create(post=post, author=author, text="Коммент")
+            Follow.objects.create(user=cls.admin, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_post_changelist_does_not_grow_with_rows(self):
+        """Авторы и группы подтягиваются одним запросом со страницей."""
+        url = reverse("admin:posts_post_changelist")
+        self.admin_client.get(url)
+        Post.objects.create(text="Еще пост", author=self.admin)
+        with self.assertNumQueries(1):
+            self.admin_client.get(url)
+
+    def test_search_by_author_username(self):
+        """Комментарии и подписки ищутся по имени автора."""
+        for name in ("comment", "follow"):
+            with self.subTest(name=name):
+                response = self.admin_client.get(
+                    reverse(f"admin:posts_{name}_changelist"),
+                    {"q": "author_3"},
+                )
+                self.assertEqual(response.context["cl"].result_count, 1)
@@ -1,7 +1,10 @@
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Comment, Post, User
+from posts.models import MAX_COMMENT_DEPTH, Comment, Post, User
+from posts.utils import COMMENT_REPLIES_SHOWN
 
 
 class CommentTests(TestCase):
@@ -36,3 +39,115 @@ class CommentTests(TestCase):
         count_comments = Comment.objects.count()
         self.guest_client.post(CommentTests.comment_url)
         self.assertEqual(count_comments, Comment.objects.count())
+
+
+class ThreadedCommentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username="thread")
+        cls.post = Post.objects.create(text="Пост", author=cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def reply(self, parent, text="Ответ"):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent
+        )
+
+    def test_reply_via_view_builds_path(self):
+        """Ответ через форму получает путь и глубину, счетчики растут."""
+        root = self.reply(None, "Корень")
+        self.authorized_client.post(
+            reverse("posts:add_comment", args=(self.post.pk,)),
+            {"text": "Ответ", "parent": root.pk},
+        )
+        reply = Comment.objects.get(parent=root)
+        self.assertEqual(reply.depth, 1)
+        self.assertEqual(reply.path, f"{root.path}/{reply.pk:010d}")
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 1)
+
+    def test_depth_is_limited(self):
+        """Слишком глубокие ответы прикрепляются к родителю."""
+        comment = None
+        for _ in range(MAX_COMMENT_DEPTH + 2):
+            comment = self.reply(comment)
+        self.assertEqual(comment.depth, MAX_COMMENT_DEPTH - 1)
+
+    def test_post_detail_loads_threads_in_fixed_queries(self):
+        """Страница корней с ответами читается фиксированным числом
+        запросов и показывает не больше заданного числа ответов."""
+        roots = [self.reply(None, f"Корень {i}") for i in range(3)]
+        for root in roots:
+            child = self.reply(root)
+            for _ in range(COMMENT_REPLIES_SHOWN):
+                self.reply(child)
+        post_detail = reverse("posts:post_detail", args=(self.post.pk,))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(post_detail)
+        comment_queries = [
+            query for query in queries if "posts_comment" in query["sql"]
+        ]
+        self.assertEqual(len(comment_queries), 3)
+        first = response.context["comments"][0]
+        self.assertEqual(first, roots[0])
+        self.assertEqual(len(first.shown_replies), COMMENT_REPLIES_SHOWN)
+        self.assertEqual(first.hidden_replies, 1)
+
+    def test_replies_query_reads_only_shown_replies(self):
+        """Из большой ветки читаются только показываемые ответы."""
+        root = self.reply(None, "Корень")
+        for _ in range(COMMENT_REPLIES_SHOWN * 5):
+            self.reply(root)
+        post_detail = reverse("posts:post_detail", args=(self.post.pk,))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(post_detail)
+        replies_sql = [
+            query["sql"]
+            for query in queries
+            if "posts_comment" in query["sql"]
+        ][-1]
+        with connection.cursor() as cursor:
+            cursor.execute(replies_sql)
+            self.assertEqual(len(cursor.fetchall()), COMMENT_REPLIES_SHOWN)
+        first = response.context["comments"][0]
+        self.assertEqual(
+            first.shown_replies,
+            list(root.replies.order_by("path")[:COMMENT_REPLIES_SHOWN]),
+        )
+        self.assertEqual(first.hidden_replies, COMMENT_REPLIES_SHOWN * 4)
+
+    def test_hidden_replies_link_to_whole_thread(self):
+        """Ответы сверх показанных доступны на странице ветки."""
+        root = self.reply(None, "Корень")
+        replies = [self.reply(root) for _ in range(COMMENT_REPLIES_SHOWN + 2)]
+        thread_url = reverse(
+            "posts:comment_thread", args=(self.post.pk, root.pk)
+        )
+        response = self.authorized_client.get(
+            reverse("posts:post_detail", args=(self.post.pk,))
+        )
+        self.assertContains(response, thread_url)
+        response = self.authorized_client.get(thread_url)
+        self.assertEqual(response.context["root"], root)
+        self.assertEqual(list(response.context["page_obj"]), replies)
+
+    def test_deleted_root_with_live_replies_is_placeholder(self):
+        """Удаленный корень с живыми ответами остается заглушкой."""
+        root = self.reply(None, "Удаленный корень")
+        reply = self.reply(root, "Живой ответ")
+        lonely = self.reply(None, "Удаленный без ответов")
+        Comment.all_objects.filter(pk__in=(root.pk, lonely.pk)).update(
+            is_deleted=True
+        )
+        response = self.authorized_client.get(
+            reverse("posts:post_detail", args=(self.post.pk,))
+        )
+        comments = list(response.context["comments"])
+        self.assertEqual(comments, [root])
+        self.assertEqual(comments[0].shown_replies, [reply])
+        self.assertContains(response, "Комментарий удален")
+        self.assertNotContains(response, "Удаленный корень")
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.hll import HyperLogLog
+from posts.counters import view_counters
+from posts.models import Post, User
+
+
+class HyperLogLogTests(TestCase):
+    def test_estimate_close_to_exact(self):
+        """Оценка отличается от точного числа не больше чем на 10%."""
+        sketch = HyperLogLog()
+        for value in range(5000):
+            sketch.add(value)
+            sketch.add(value)
+        self.assertAlmostEqual(sketch.count(), 5000, delta=500)
+
+    def test_merge_equals_union(self):
+        first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        for value in range(300):
+            (first if value % 2 else second).add(value)
+            union.add(value)
+        first.merge(second)
+        self.assertEqual(first.to_bytes(), union.to_bytes())
+
+
+@override_settings(VIEW_COUNTS_FLUSH_INTERVAL=60)
+class ViewCountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        cls.posts = [
+            Post.objects.create(text=f"Пост {i}", author=cls.author)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        view_counters.flush()
+
+    def test_views_batched_and_shown(self):
+        """Просмотры видны сразу, а в БД пишутся пачкой."""
+        url = reverse("posts:post_detail", args=(self.posts[0].pk,))
+        for _ in range(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context["views"], 3)
+        self.client.get(reverse("posts:post_detail", args=(self.posts[1].pk,)))
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 0)
+        with self.assertNumQueries(4):
+            # Две величины прироста - два UPDATE в транзакции
+            view_counters.flush()
+        self.assertEqual(
+            list(Post.objects.order_by("pk").values_list("views", flat=True)),
+            [3, 1, 0],
+        )
+
+    def test_unique_profile_visitors(self):
+        """Повторные визиты одного посетителя не увеличивают счетчик."""
+        url = reverse("posts:profile", args=("author",))
+        for _ in range(3):
+            self.client.get(url)
+        reader = User.objects.create_user(username="reader")
+        self.client.force_login(reader)
+        response = self.client.get(url)
+        self.assertEqual(response.context["visitors"], 2)
+        view_counters.flush()
+        self.assertEqual(view_counters.unique_visitors(self.author.pk), 2)
@@ -0,0 +1,134 @@
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import TEXT_PREVIEW_LENGTH, Group, Post, User
+
+
+class AuthorSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="leo", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(title="Группа", slug="group")
+        cls.post = Post.objects.create(
+            text="Пост", author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_snapshot_taken_on_create(self):
+        """Новый пост запоминает логин и имя автора."""
+        self.assertEqual(self.post.author_username, "leo")
+        self.assertEqual(self.post.author_full_name, "Лев Толстой")
+
+    def test_snapshot_taken_on_bulk_create(self):
+        """bulk_create заполняет снимок одним запросом к авторам."""
+        with self.assertNumQueries(2):
+            Post.objects.bulk_create(
+                Post(text=f"Пост {i}", author_id=self.author.pk)
+                for i in range(3)
+            )
+        self.assertFalse(Post.objects.filter(author_username="").exists())
+
+    def test_snapshot_follows_author_change(self):
+        """Смена автора поста обновляет снимок и ленты обоих авторов."""
+        other = User.objects.create_user(
+            username="fyodor", first_name="Федор", last_name="Достоевский"
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        self.client.get(reverse("posts:profile", args=("leo",)))
+        post.author = other
+        post.save()
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.author_username, "fyodor")
+        self.assertEqual(post.author_full_name, "Федор Достоевский")
+        response = self.client.get(reverse("posts:profile", args=("leo",)))
+        self.assertNotIn(post, response.context["page_obj"])
+
+    def test_migration_backfills_snapshot(self):
+        """Миграция заполняет снимок в уже существующих постах."""
+        migration = import_module(
+            "posts.migrations.0021_backfill_author_snapshot"
+        )
+        Post.objects.update(author_username="", author_full_name="")
+        migration.fill_author_snapshot(apps, None)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.author_username, "leo")
+        self.assertEqual(post.author_full_name, "Лев Толстой")
+
+    def test_migration_backfills_text_preview(self):
+        """Миграция заполняет начало текста в уже существующих постах."""
+        migration = import_module(
+            "posts.migrations.0022_backfill_text_preview"
+        )
+        Post.objects.update(text_preview="")
+        migration.fill_text_preview(apps, None)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text_preview, "Пост")
+
+    def test_snapshot_follows_user_changes(self):
+        """Изменение пользователя обновляет снимок в его постах."""
+        self.author.username = "tolstoy"
+        self.author.last_name = "Николаевич"
+        self.author.save()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.author_username, "tolstoy")
+        self.assertEqual(post.author_full_name, "Лев Николаевич")
+
+    def test_feeds_do_not_join_users(self):
+        """Ленты не читают auth_user, а карточки берут снимок."""
+        for url in (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, "Лев Толстой")
+                post_queries = [
+                    q["sql"] for q in queries if "posts_post" in q["sql"]
+                ]
+                self.assertTrue(post_queries)
+                for sql in post_queries:
+                    self.assertNotIn("auth_user", sql)
+
+    def test_feeds_read_preview_instead_of_text(self):
+        """Ленты берут начало текста, полный текст - только пост."""
+        long_post = Post.objects.create(
+            text="слово " * 200 + "конец", author=self.author
+        )
+        self.assertEqual(len(long_post.text_preview), TEXT_PREVIEW_LENGTH)
+        self.assertTrue(long_post.text_preview.endswith("…"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("posts:index"))
+        self.assertNotContains(response, "конец")
+        for query in queries:
+            self.assertNotIn('"posts_post"."text",', query["sql"])
+        response = self.client.get(
+            reverse("posts:post_detail", args=(long_post.pk,))
+        )
+        self.assertContains(response, "конец")
+
+    def test_backfill_fills_missing_fields(self):
+        """Команда заполняет снимок и начало текста у старых постов."""
+        Post.all_objects.update(
+            author_username="", author_full_name="", text_preview=""
+        )
+        call_command("backfill_denormalized", batch_size=1, stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.author_username, "leo")
+        self.assertEqual(post.author_full_name, "Лев Толстой")
+        self.assertEqual(post.text_preview, "Пост")
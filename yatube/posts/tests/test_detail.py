@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.counters import view_counters
+from posts.models import Comment, Group, ModerationJob, Post, User
+from posts.recent import recent_posts
+
+
+@override_settings(POST_DETAIL_TIMEOUT=60, RECENT_POSTS_TIMEOUT=60)
+class PostDetailBundleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(
+            title="Группа", slug="group", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            text="Текст поста", author=cls.author, group=cls.group
+        )
+        Post.objects.create(text="Второй пост", author=cls.author)
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text="Комментарий"
+        )
+
+    def setUp(self):
+        cache.clear()
+        recent_posts.clear()
+        self.url = reverse("posts:post_detail", args=(self.post.pk,))
+
+    def test_cold_page_reads_post_in_one_query(self):
+        """Пост, автор, группа и число постов автора - один запрос."""
+        response = self.client.get(self.url)
+        post = response.context["post"]
+        with self.assertNumQueries(0):
+            self.assertEqual(post.author.get_full_name(), "Лев Толстой")
+            self.assertEqual(post.group.title, "Группа")
+            self.assertEqual(post.author_posts_count, 2)
+        self.assertContains(response, "Комментарий")
+
+    def test_warm_page_makes_no_queries(self):
+        """Теплый пакет отдается без запросов к БД."""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Текст поста")
+        self.assertContains(response, "Комментарий")
+
+    def test_comment_resets_bundle(self):
+        self.client.get(self.url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text="Новый комментарий"
+        )
+        self.assertContains(self.client.get(self.url), "Новый комментарий")
+
+    def test_edit_and_new_post_reset_bundle(self):
+        """Правка поста и новый пост автора видны сразу."""
+        self.client.get(self.url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = "Исправленный текст"
+        post.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Исправленный текст")
+        Post.objects.create(text="Третий пост", author=self.author)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["post"].author_posts_count, 3)
+
+    def test_deleted_post_is_not_served_from_bundle(self):
+        self.client.get(self.url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.is_deleted = True
+        post.save(update_fields=["is_deleted"])
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_view_count_stays_fresh(self):
+        """Сброс счетчиков просмотров не сбрасывает пакет страницы."""
+        view_counters.flush()
+        first = self.client.get(self.url).context["views"]
+        self.client.get(self.url)
+        view_counters.flush()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context["views"], first + 2)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).views + 1, first + 2
+        )
+
+    def test_moderation_batch_resets_bundle(self):
+        """Комментарии, скрытые модерацией, пропадают со страницы поста."""
+        self.client.get(self.url)
+        job = ModerationJob.objects.create(
+            action=ModerationJob.PURGE_COMMENTS, pattern="Комментарий"
+        )
+        job.run_batch(10)
+        self.assertNotContains(self.client.get(self.url), "Комментарий")
@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.feed_events import FeedHub, feed_hub
+from posts.models import Follow, User
+
+UPDATES = reverse("posts:follow_updates")
+
+
+class FeedHubTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_only_followed_authors(self):
+        """Считаются только посты авторов из подписок после курсора."""
+        hub = FeedHub()
+        hub.publish(1)
+        cursor = hub.cursor
+        hub.publish(1)
+        hub.publish(2)
+        hub.publish(3)
+        self.assertEqual(hub.new_posts(cursor, {1, 3}), (2, hub.cursor))
+
+    def test_events_shared_through_cache(self):
+        """События другого процесса видны через общий кэш."""
+        FeedHub().publish(1)
+        new, cursor = FeedHub().new_posts("", {1})
+        self.assertEqual((new, cursor), (1, feed_hub.cursor))
+        self.assertTrue(cursor.endswith(":1"))
+
+    def test_cursor_from_future_is_reset(self):
+        """Курсор из будущего не ломает подсчет."""
+        hub = FeedHub()
+        hub.publish(1)
+        epoch = hub.cursor.split(":")[0]
+        self.assertEqual(hub.new_posts(f"{epoch}:100", {1}), (0, hub.cursor))
+
+    def test_lost_counter_starts_new_epoch(self):
+        """Старые события не считаются новыми после потери счетчика."""
+        hub = FeedHub()
+        for _ in range(3):
+            hub.publish(1)
+        old_cursor = hub.cursor
+        epoch = old_cursor.split(":")[0]
+        cache.delete(f"feed_cursor:{epoch}")
+        hub.publish(1)
+        self.assertNotEqual(hub.cursor.split(":")[0], epoch)
+        self.assertEqual(hub.new_posts(old_cursor, {1}), (0, hub.cursor))
+        self.assertEqual(hub.new_posts(hub.cursor, {1}), (0, hub.cursor))
+
+
+class FollowUpdatesViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="reader")
+        cls.author = User.objects.create_user(username="writer")
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_post_create_publishes_to_followers(self):
+        """Новый пост автора виден в опросе ленты подписчика."""
+        cursor = feed_hub.cursor
+        self.author_client.post(
+            reverse("posts:post_create"), data={"text": "Новый пост"}
+        )
+        response = self.reader_client.get(UPDATES, {"since": cursor})
+        self.assertEqual(
+            response.json(), {"new": 1, "cursor": feed_hub.cursor}
+        )
+
+    def test_guest_redirected(self):
+        """Аноним не получает обновления ленты."""
+        response = Client().get(UPDATES)
+        self.assertEqual(response.status_code, 302)
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Comment, Follow, Group, Post
@@ -84,3 +87,53 @@ class FollowViewTest(TestCase):
         self.assertNotIn(
             self.post.text, response.context["page_obj"].object_list
         )
+
+    def test_following_ids_loaded_once_per_request(self):
+        """Подписки для кнопок в ленте читаются одним запросом."""
+        cache.clear()
+        for i in range(3):
+            author = User.objects.create(username=f"author_{i}")
+            Post.objects.create(author=author, text=f"Пост {i}")
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(reverse("posts:index"))
+        follow_queries = [
+            query for query in queries if "posts_follow" in query["sql"]
+        ]
+        self.assertEqual(len(follow_queries), 1)
+
+    def test_follow_resets_following_ids(self):
+        """Подписка и отписка сбрасывают закэшированные подписки."""
+        cache.clear()
+        profile_url = reverse(
+            "posts:profile", kwargs={"username": self.user_2}
+        )
+        response = self.authorized_client.get(profile_url)
+        self.assertFalse(response.context["following"])
+        self.authorized_client.get(
+            reverse("posts:profile_follow", kwargs={"username": self.user_2})
+        )
+        response = self.authorized_client.get(profile_url)
+        self.assertTrue(response.context["following"])
+        self.assertIn(self.user_2.pk, response.context["following_ids"])
+        self.authorized_client.get(
+            reverse("posts:profile_unfollow", kwargs={"username": self.user_2})
+        )
+        response = self.authorized_client.get(profile_url)
+        self.assertFalse(response.context["following"])
+
+    def test_follow_buttons_fresh_on_cached_index(self):
+        """Кнопки подписки не кэшируются во фрагменте ленты."""
+        cache.clear()
+        author = User.objects.create(username="author_fresh")
+        Post.objects.create(author=author, text="Свежий пост")
+        reader = Client()
+        reader.force_login(self.user_2)
+        reader.get(reverse("posts:index"))
+        reader.get(
+            reverse("posts:profile_follow", kwargs={"username": author})
+        )
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(response, "[]</script>")
+        response = reader.get(reverse("posts:index"))
+        self.assertContains(response, f'data-author="{author.pk}"')
+        self.assertContains(response, f"{author.pk}]</script>")
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+GROUP_INDEX = reverse("posts:group_index")
+
+
+class GroupIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+        cls.group = Group.objects.create(
+            title="Коты", slug="cats", description="Про котов"
+        )
+        cls.empty_group = Group.objects.create(
+            title="Собаки", slug="dogs", description="Про собак"
+        )
+
+    def setUp(self):
+        cache.clear()
+        Post.objects.create(text="Старый", author=self.user, group=self.group)
+        self.latest = Post.objects.create(
+            text="Новый", author=self.user, group=self.group
+        )
+        Post.objects.create(
+            text="Скрытый", author=self.user, group=self.group,
+            is_deleted=True,
+        )
+
+    def test_directory_counts_and_latest_post(self):
+        """Каталог показывает число видимых постов и последний пост."""
+        response = self.client.get(GROUP_INDEX)
+        cats, dogs = response.context["page_obj"]
+        self.assertEqual(cats["posts_count"], 2)
+        self.assertEqual(cats["latest_post_id"], self.latest.pk)
+        self.assertEqual(cats["latest_text"], "Новый")
+        self.assertEqual(dogs["posts_count"], 0)
+        self.assertIsNone(dogs["latest_post_id"])
+
+    def test_warm_directory_makes_no_queries(self):
+        """Повторный показ каталога не обращается к БД."""
+        self.client.get(GROUP_INDEX)
+        with self.assertNumQueries(0):
+            self.client.get(GROUP_INDEX)
+
+    def test_post_write_refreshes_directory(self):
+        """Новый пост сбрасывает закэшированный каталог."""
+        self.client.get(GROUP_INDEX)
+        Post.objects.create(text="Свежий", author=self.user, group=self.group)
+        response = self.client.get(GROUP_INDEX)
+        self.assertEqual(response.context["page_obj"][0]["posts_count"], 3)
@@ -0,0 +1,111 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.images import variant_formats, variants_dir
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name, size):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageVariantsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_post(self, size):
+        self.client.post(
+            reverse("posts:post_create"),
+            {"text": "Картинка", "image": image_file("pic.png", size)},
+        )
+        return Post.objects.latest("pk")
+
+    def test_variants_generated_on_upload(self):
+        """Загрузка создает копии всех ширин в каждом формате."""
+        post = self.create_post((1200, 600))
+        variants = json.loads(post.image_variants)
+        self.assertEqual(
+            {(v["format"], v["width"]) for v in variants},
+            {
+                (fmt, width)
+                for fmt in variant_formats()
+                for width in (320, 640, 960)
+            },
+        )
+        for variant in variants:
+            self.assertTrue(
+                variant["name"].startswith(variants_dir(post.image.name))
+            )
+            with default_storage.open(variant["name"]) as file:
+                image = Image.open(file)
+                self.assertEqual(image.size[0], variant["width"])
+                self.assertEqual(image.size[1], variant["width"] // 2)
+
+    def test_small_image_not_upscaled(self):
+        """Маленькая картинка не растягивается."""
+        post = self.create_post((200, 100))
+        self.assertEqual(
+            {v["width"] for v in json.loads(post.image_variants)}, {200}
+        )
+
+    def test_feed_renders_srcset(self):
+        """Лента отдает <picture> с srcset вариантов."""
+        self.create_post((700, 300))
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "<picture>")
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, "640w")
+
+    def test_dimensions_and_placeholder_stored(self):
+        """Размеры и заглушка считаются один раз при загрузке."""
+        post = self.create_post((700, 300))
+        self.assertEqual((post.image_width, post.image_height), (700, 300))
+        self.assertEqual(post.image_color, "#c81e1e")
+        self.assertTrue(post.image_placeholder.startswith("data:image/"))
+        self.assertLess(len(post.image_placeholder), 500)
+
+    def test_feed_images_lazy_with_intrinsic_size(self):
+        """В ленте картинки, кроме первой, грузятся лениво."""
+        self.create_post((700, 300))
+        self.create_post((800, 400))
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, 'loading="eager"', count=1)
+        self.assertContains(response, 'loading="lazy"', count=1)
+        self.assertContains(response, 'width="700" height="300"')
+
+    def test_garbage_collector_keeps_variants_of_used_images(self):
+        """Варианты живут, пока на исходник ссылается пост."""
+        post = self.create_post((700, 300))
+        names = [v["name"] for v in json.loads(post.image_variants)]
+        call_command("collect_media_garbage", min_age=0, stdout=StringIO())
+        self.assertTrue(all(default_storage.exists(n) for n in names))
+        Post.all_objects.filter(pk=post.pk).delete()
+        call_command("collect_media_garbage", min_age=0, stdout=StringIO())
+        self.assertFalse(any(default_storage.exists(n) for n in names))
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.management.commands.collect_media_garbage import scan_files
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CollectMediaGarbageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.used = default_storage.save("posts/used.gif", ContentFile(b"1"))
+        self.orphan = default_storage.save(
+            "posts/old/orphan.gif", ContentFile(b"2")
+        )
+        Post.objects.create(text="Пост", author=self.user, image=self.used)
+
+    def collect(self, **options):
+        out = StringIO()
+        call_command(
+            "collect_media_garbage", min_age=0, stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_dry_run_only_reports_orphans(self):
+        """В режиме dry run файлы только перечисляются."""
+        output = self.collect(dry_run=True)
+        self.assertIn(self.orphan, output)
+        self.assertNotIn(self.used, output)
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_orphans_are_deleted_in_batches(self):
+        """Файлы без ссылок удаляются, используемые остаются."""
+        self.collect(batch_size=1)
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.used))
+
+    def test_fresh_files_are_skipped(self):
+        """Свежие файлы не трогаются: пост может быть еще не сохранен."""
+        call_command("collect_media_garbage", stdout=StringIO())
+        self.assertTrue(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, self.orphan))
+        )
+
+    def test_scan_resumes_after_cursor(self):
+        """Обход с курсора дает ровно оставшуюся часть полного обхода."""
+        for name in ("posts/a.gif", "posts/z/b.gif", "posts/z/y/c.gif"):
+            default_storage.save(name, ContentFile(name.encode()))
+        root = os.path.join(TEMP_MEDIA_ROOT, "posts")
+        paths = list(scan_files(root, 0))
+        self.assertEqual(len(paths), len(set(paths)))
+        for window in (1, 2, 100):
+            self.assertEqual(list(scan_files(root, 0, window=window)), paths)
+            for number, path in enumerate(paths):
+                with self.subTest(window=window, start_after=path):
+                    self.assertEqual(
+                        list(scan_files(root, 0, path, window)),
+                        paths[number + 1:],
+                    )
+
+    def test_limit_continues_where_previous_run_stopped(self):
+        """Запуски с --limit по очереди проходят все дерево."""
+        orphans = [self.orphan] + [
+            default_storage.save(f"posts/old/{i}.gif", ContentFile(b"%d" % i))
+            for i in range(3, 6)
+        ]
+        root = os.path.join(TEMP_MEDIA_ROOT, "posts")
+        for _ in range(len(list(scan_files(root, 0)))):
+            self.collect(limit=1)
+        # Пустой запуск доходит до конца и сбрасывает курсор
+        self.collect(limit=1)
+        for name in orphans:
+            self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(self.used))
+        self.assertIsNone(cache.get("media_garbage_cursor"))
@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Membership, Post, User
+from posts.timeline import MergedTimeline, group_timeline
+from posts.utils import get_group_ids
+
+
+class MembershipTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="member")
+        cls.author = User.objects.create_user(username="author")
+        cls.groups = [
+            Group.objects.create(
+                title=f"Группа {i}", slug=f"group-{i}", description="Описание"
+            )
+            for i in range(3)
+        ]
+        for number in range(9):
+            Post.objects.create(
+                text=f"Пост {number}",
+                author=cls.author,
+                group=cls.groups[number % 3],
+            )
+        Post.objects.create(text="Без группы", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def join(self, group):
+        return self.client.get(
+            reverse("posts:group_join", kwargs={"slug": group.slug})
+        )
+
+    def test_join_and_leave(self):
+        """Вступление и выход меняют членство и кэш групп."""
+        group = self.groups[0]
+        self.assertEqual(get_group_ids(self.user), set())
+        response = self.join(group)
+        self.assertRedirects(
+            response, reverse("posts:group_list", kwargs={"slug": group.slug})
+        )
+        self.join(group)
+        self.assertEqual(
+            Membership.objects.filter(user=self.user, group=group).count(), 1
+        )
+        self.assertEqual(get_group_ids(self.user), {group.pk})
+        response = self.client.get(
+            reverse("posts:group_list", kwargs={"slug": group.slug})
+        )
+        self.assertTrue(response.context["is_member"])
+        self.client.get(
+            reverse("posts:group_leave", kwargs={"slug": group.slug})
+        )
+        self.assertFalse(Membership.objects.filter(user=self.user).exists())
+        self.assertEqual(get_group_ids(self.user), set())
+
+    def test_my_groups_merges_group_feeds(self):
+        """Лента групп совпадает с общим запросом по группам."""
+        for group in self.groups[:2]:
+            self.join(group)
+        group_ids = {group.pk for group in self.groups[:2]}
+        expected = list(
+            Post.objects.filter(group_id__in=group_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        timeline = group_timeline(self.user)
+        self.assertIsInstance(timeline, MergedTimeline)
+        self.assertEqual(timeline.count(), len(expected))
+        self.assertEqual([post.pk for post in timeline[0:6]], expected)
+        response = self.client.get(reverse("posts:my_groups"))
+        self.assertEqual(
+            [post.pk for post in response.context["page_obj"]], expected
+        )
+
+    def test_moved_post_leaves_old_group_feed(self):
+        """Пост, перенесенный в другую группу, пропадает из старой ленты."""
+        source, target = self.groups[0], self.groups[2]
+        self.join(source)
+        self.join(target)
+        post = Post.objects.filter(group=source).first()
+        # Прогреваем списки групп
+        group_timeline(self.user).count()
+        post = Post.objects.get(pk=post.pk)
+        post.group = target
+        post.save()
+        source_timeline = MergedTimeline({source.pk}, field="group_id")
+        target_timeline = MergedTimeline({target.pk}, field="group_id")
+        self.assertNotIn(post.pk, [p.pk for p in source_timeline[0:10]])
+        self.assertIn(post.pk, [p.pk for p in target_timeline[0:10]])
@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, ModerationJob, Post, User
+
+
+class ModerationJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.spammer = User.objects.create_user(username="spammer")
+        cls.user = User.objects.create_user(username="user")
+        cls.group = Group.objects.create(
+            title="Старая", slug="old", description="Описание"
+        )
+        cls.target = Group.objects.create(
+            title="Новая", slug="new", description="Описание"
+        )
+
+    def setUp(self):
+        for i in range(5):
+            post = Post.objects.create(
+                text=f"Спам {i}", author=self.spammer, group=self.group
+            )
+            Comment.objects.create(
+                post=post, author=self.user, text=f"Купите {i}"
+            )
+        self.own_post = Post.objects.create(
+            text="Обычный пост", author=self.user, group=self.group
+        )
+
+    def test_job_is_resumable_by_cursor(self):
+        """Задание обрабатывает пачки и продолжает с курсора."""
+        job = ModerationJob.objects.create(
+            action=ModerationJob.DELETE_AUTHOR_POSTS,
+            author=self.spammer,
+            total=5,
+        )
+        self.assertEqual(job.run_batch(2), 2)
+        job = ModerationJob.objects.get(pk=job.pk)
+        self.assertEqual(job.processed, 2)
+        self.assertFalse(job.done)
+        self.assertEqual(job.run_batch(2), 2)
+        self.assertEqual(job.run_batch(2), 1)
+        self.assertTrue(job.done)
+        self.assertEqual(list(Post.objects.all()), [self.own_post])
+
+    def test_command_runs_pending_jobs(self):
+        """run_moderation_jobs доводит задания до конца."""
+        ModerationJob.objects.create(
+            action=ModerationJob.REASSIGN_GROUP,
+            group=self.group,
+            target_group=self.target,
+        )
+        ModerationJob.objects.create(
+            action=ModerationJob.PURGE_COMMENTS, pattern="Купите"
+        )
+        call_command("run_moderation_jobs", batch_size=2, stdout=StringIO())
+        self.assertFalse(ModerationJob.objects.filter(done=False).exists())
+        self.assertEqual(self.target.posts.count(), 6)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_admin_action_uses_search_as_pattern(self):
+        """Действие в админке создает задание по поисковому запросу."""
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        admin_client = Client()
+        admin_client.force_login(admin)
+        admin_client.post(
+            reverse("admin:posts_comment_changelist") + "?q=Купите",
+            {
+                "action": "purge_matching_comments",
+                "_selected_action": Comment.objects.values_list(
+                    "pk", flat=True
+                )[:1],
+            },
+        )
+        job = ModerationJob.objects.get()
+        self.assertEqual(job.pattern, "Купите")
+        self.assertEqual(job.total, 5)
@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Notification, Post, User
+from posts.notifications import (
+    NotificationBuffer,
+    get_unread_count,
+    notification_buffer,
+)
+
+INDEX = reverse("posts:index")
+NOTIFICATIONS = reverse("posts:notifications")
+
+
+@override_settings(NOTIFICATIONS_FLUSH_INTERVAL=60)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.post = Post.objects.create(text="Пост", author=cls.author)
+        cls.readers = [
+            User.objects.create_user(username=f"reader_{i}")
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        notification_buffer.flush()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def comment_as(self, user):
+        client = Client()
+        client.force_login(user)
+        client.post(
+            reverse("posts:add_comment", args=(self.post.pk,)),
+            {"text": "Комментарий"},
+        )
+
+    def test_repeated_events_are_coalesced(self):
+        """Несколько комментариев дают одно уведомление со счетчиком."""
+        for reader in self.readers:
+            self.comment_as(reader)
+        self.assertFalse(Notification.objects.exists())
+        notification_buffer.flush()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.count, 3)
+        self.assertEqual(notification.last_actor, self.readers[-1])
+        self.comment_as(self.readers[0])
+        notification_buffer.flush()
+        self.assertEqual(Notification.objects.get().count, 4)
+
+    def test_unread_badge_served_from_cache(self):
+        """Значок непрочитанных не добавляет запросов к БД."""
+        self.assertEqual(get_unread_count(self.author), 0)
+        self.comment_as(self.readers[0])
+        notification_buffer.flush()
+        self.author_client.get(INDEX)
+        with self.assertNumQueries(1):
+            response = self.author_client.get(INDEX)
+        self.assertEqual(response.context["unread_notifications"], 1)
+
+    def test_inbox_flushes_and_marks_read(self):
+        """Входящие показывают свежие события и отмечают их прочитанными."""
+        self.comment_as(self.readers[0])
+        reader_client = Client()
+        reader_client.force_login(self.readers[1])
+        reader_client.get(reverse("posts:profile_follow", args=("author",)))
+        response = self.author_client.get(NOTIFICATIONS)
+        self.assertEqual(len(response.context["page_obj"]), 2)
+        self.assertFalse(response.context["page_obj"][0].is_read)
+        self.assertEqual(get_unread_count(self.author), 0)
+        self.assertFalse(
+            self.author.notifications.filter(is_read=False).exists()
+        )
+
+    def test_badge_counts_only_written_events(self):
+        """Значок растет при записи в БД, а не при добавлении в буфер."""
+        self.assertEqual(get_unread_count(self.author), 0)
+        self.comment_as(self.readers[0])
+        self.assertEqual(get_unread_count(self.author), 0)
+        notification_buffer.flush()
+        self.assertEqual(get_unread_count(self.author), 1)
+
+    def test_events_flushed_by_other_process_after_inbox(self):
+        """События из буфера другого процесса видны после прочтения."""
+        self.author_client.get(NOTIFICATIONS)
+        other = NotificationBuffer()
+        other.add(
+            self.author.pk, Notification.COMMENT, self.readers[0].pk, None
+        )
+        other.flush()
+        self.assertEqual(get_unread_count(self.author), 1)
+
+    def test_buffer_flushes_by_timer(self):
+        """Первое событие заводит таймер сброса, сброс его снимает."""
+        buffer = NotificationBuffer()
+        buffer.add(self.author.pk, Notification.FOLLOW, self.readers[0].pk)
+        self.assertTrue(buffer._timer.is_alive())
+        buffer.flush()
+        self.assertIsNone(buffer._timer)
@@ -0,0 +1,58 @@
+import threading
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.decorators import _hit
+from posts.models import Comment, Post, User
+
+
+@override_settings(RATELIMITS={"posts:add_comment": (2, 60)})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="spammer")
+        cls.post = Post.objects.create(text="Пост", author=cls.user)
+        cls.comment_url = reverse("posts:add_comment", args=(cls.post.pk,))
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comment_flood_gets_429(self):
+        """Сверх лимита комментарии отклоняются с Retry-After."""
+        for _ in range(2):
+            self.authorized_client.post(self.comment_url, {"text": "спам"})
+        response = self.authorized_client.post(
+            self.comment_url, {"text": "спам"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_limit_is_per_user(self):
+        """Лимит одного пользователя не задевает другого."""
+        for _ in range(3):
+            self.authorized_client.post(self.comment_url, {"text": "спам"})
+        other = User.objects.create_user(username="reader")
+        other_client = Client()
+        other_client.force_login(other)
+        response = other_client.post(self.comment_url, {"text": "вопрос"})
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_concurrent_hits_are_not_lost(self):
+        """Параллельные запросы не теряют обращений к счетчику окна."""
+        def flood():
+            for _ in range(50):
+                _hit("flood", 60)
+
+        threads = [threading.Thread(target=flood) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get("flood"), 400)
@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.recent import AuthorTimeline, recent_posts
+
+
+@override_settings(RECENT_POSTS_TIMEOUT=300, RECENT_POSTS_PER_AUTHOR=12)
+class RecentPostsCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author")
+        for number in range(15):
+            Post.objects.create(text=f"Пост {number}", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        recent_posts.clear()
+        self.client.force_login(self.author)
+
+    def ids(self, number=1):
+        response = self.client.get(
+            reverse("posts:profile", args=("author",)), {"page": number}
+        )
+        return [post.pk for post in response.context["page_obj"]]
+
+    def expected(self):
+        return list(
+            Post.objects.filter(author=self.author).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def test_first_page_served_from_memory(self):
+        """Первая страница профиля не читает посты из БД."""
+        self.ids()
+        expected = self.expected()[:10]
+        with self.assertNumQueries(0):
+            timeline = AuthorTimeline(self.author.pk)
+            self.assertEqual(timeline.count(), 15)
+            self.assertEqual([post.pk for post in timeline[0:10]], expected)
+
+    def test_deep_page_read_from_db(self):
+        """Страницы глубже списка читаются запросом."""
+        self.assertEqual(self.ids(2), self.expected()[10:])
+
+    def test_create_edit_delete_keep_list_current(self):
+        """Создание, правка и удаление поста обновляют список на месте."""
+        self.ids()
+        self.client.post(reverse("posts:post_create"), {"text": "Новый"})
+        new = Post.objects.latest("pub_date")
+        self.client.post(
+            reverse("posts:post_edit", args=(new.pk,)), {"text": "Правка"}
+        )
+        ring = recent_posts.get(self.author.pk)
+        self.assertEqual(ring.posts[0].text_preview, "Правка")
+        self.assertEqual(ring.count, 16)
+        self.client.post(reverse("posts:post_delete", args=(new.pk,)))
+        with self.assertNumQueries(0):
+            ring = recent_posts.get(self.author.pk)
+        self.assertEqual(
+            [post.pk for post in ring.posts], self.expected()[:11]
+        )
+        self.assertEqual(ring.count, 15)
+
+    def test_stale_version_reloads(self):
+        """Запись в другом процессе делает список устаревшим."""
+        self.ids()
+        cache.set("recent_version:{}".format(self.author.pk), 7)
+        with self.assertNumQueries(2):
+            recent_posts.get(self.author.pk)
+
+    @override_settings(RECENT_POSTS_MEMORY=1)
+    def test_memory_budget_evicts(self):
+        """Сверх бюджета памяти списки не удерживаются."""
+        self.ids()
+        self.assertNotIn(self.author.pk, recent_posts._rings)
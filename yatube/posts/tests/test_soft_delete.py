@@ -0,0 +1,120 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x02\x00"
+    b"\x01\x00\x80\x00\x00\x00\x00\x00"
+    b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+    b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+    b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+    b"\x0A\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SoftDeleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(
+            text="Пост с картинкой",
+            author=self.user,
+            image=SimpleUploadedFile("small.gif", SMALL_GIF, "image/gif"),
+        )
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f"Коммент {i}")
+            for i in range(5)
+        )
+
+    def test_post_delete_hides_post_immediately(self):
+        """Удаленный пост пропадает из выдачи, но строка остается."""
+        self.authorized_client.get(
+            reverse("posts:post_delete", args=(self.post.pk,))
+        )
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(Comment.all_objects.count(), 5)
+        response = self.authorized_client.get(
+            reverse("posts:post_detail", args=(self.post.pk,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_delete_hides_comment(self):
+        """Удаленный комментарий не показывается под постом."""
+        comment = self.post.comments.first()
+        self.authorized_client.get(
+            reverse("posts:comment_delete", args=(comment.pk,))
+        )
+        self.assertNotIn(comment, self.post.comments.all())
+
+    def test_purge_deletes_in_batches_with_files(self):
+        """purge_deleted удаляет строки пачками и чистит файлы."""
+        storage = self.post.image.storage
+        name = self.post.image.name
+        self.assertTrue(storage.exists(name))
+        self.post.is_deleted = True
+        self.post.save(update_fields=["is_deleted"])
+        call_command(
+            "purge_deleted", batch_size=2, min_age=0, stdout=StringIO()
+        )
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.all_objects.exists())
+        self.assertFalse(storage.exists(name))
+
+    def test_purge_keeps_fresh_files(self):
+        """Свежий файл переживает purge: его могли загрузить повторно."""
+        storage = self.post.image.storage
+        name = self.post.image.name
+        self.post.is_deleted = True
+        self.post.save(update_fields=["is_deleted"])
+        call_command("purge_deleted", stdout=StringIO())
+        self.assertFalse(Post.all_objects.exists())
+        self.assertTrue(storage.exists(name))
+
+    def test_purge_removes_threads_from_leaves(self):
+        """Ветки удаляются от листьев, пачка не захватывает поддерево."""
+        root = Comment.objects.create(
+            post=self.post, author=self.user, text="Корень"
+        )
+        reply = Comment.objects.create(
+            post=self.post, author=self.user, text="Ответ", parent=root
+        )
+        Comment.objects.create(
+            post=self.post, author=self.user, text="Живой", parent=reply
+        )
+        Comment.all_objects.filter(pk__in=(root.pk, reply.pk)).update(
+            is_deleted=True
+        )
+        call_command("purge_deleted", batch_size=1, stdout=StringIO())
+        # Ответ с живым ответом остается
+        self.assertTrue(Comment.all_objects.filter(pk=reply.pk).exists())
+        self.assertTrue(Comment.objects.filter(parent=reply).exists())
+        Comment.all_objects.filter(parent=reply).update(is_deleted=True)
+        call_command(
+            "purge_deleted", batch_size=1, max_batches=1, stdout=StringIO()
+        )
+        self.assertTrue(Comment.all_objects.filter(pk=reply.pk).exists())
+        self.assertFalse(Comment.all_objects.filter(parent=reply).exists())
+        call_command("purge_deleted", batch_size=1, stdout=StringIO())
+        self.assertFalse(Comment.all_objects.filter(is_deleted=True).exists())
+        self.assertEqual(Comment.all_objects.count(), 5)
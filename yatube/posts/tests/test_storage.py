@@ -0,0 +1,105 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+from posts.storage import post_image_storage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png_bytes(color):
+    buffer = BytesIO()
+    Image.new("RGB", (400, 200), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="author")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def upload(self, content, name="meme.png"):
+        self.client.post(
+            reverse("posts:post_create"),
+            {
+                "text": "Мем",
+                "image": SimpleUploadedFile(name, content, "image/png"),
+            },
+        )
+        return Post.objects.latest("pk")
+
+    def test_file_named_by_content_hash(self):
+        """Файл сохраняется под sha256 содержимого."""
+        sha = hashlib.sha256(b"content").hexdigest()
+        name = post_image_storage.save("posts/a.PNG", ContentFile(b"content"))
+        self.assertEqual(name, f"posts/{sha[:2]}/{sha}.png")
+        with post_image_storage.open(name) as file:
+            self.assertEqual(file.read(), b"content")
+
+    def test_same_upload_stored_once(self):
+        """Одинаковые картинки делят файл и варианты."""
+        content = png_bytes((10, 20, 30))
+        first = self.upload(content, "one.png")
+        second = self.upload(content, "two.png")
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants, second.image_variants)
+        directory = os.path.dirname(
+            os.path.join(TEMP_MEDIA_ROOT, first.image.name)
+        )
+        self.assertEqual(
+            [n for n in os.listdir(directory) if n != "variants"],
+            [os.path.basename(first.image.name)],
+        )
+        self.assertNotEqual(
+            self.upload(png_bytes((30, 20, 10))).image.name,
+            first.image.name,
+        )
+
+    def test_shared_file_kept_while_referenced(self):
+        """Общий файл удаляется только вместе с последней ссылкой."""
+        content = png_bytes((50, 50, 50))
+        first = self.upload(content)
+        second = self.upload(content)
+        name = first.image.name
+        Post.all_objects.filter(pk=first.pk).update(is_deleted=True)
+        call_command("purge_deleted", min_age=0, stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+        Post.all_objects.filter(pk=second.pk).update(is_deleted=True)
+        call_command("purge_deleted", min_age=0, stdout=StringIO())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_dedupe_media_moves_legacy_files(self):
+        """Старые файлы переезжают в хранилище по хешу."""
+        legacy = default_storage.save("posts/legacy.png", ContentFile(b"x"))
+        Post.objects.create(text="Старый", author=self.user, image=legacy)
+        Post.objects.create(text="Копия", author=self.user, image=legacy)
+        call_command("dedupe_media", stdout=StringIO())
+        sha = hashlib.sha256(b"x").hexdigest()
+        self.assertEqual(
+            set(Post.objects.values_list("image", flat=True)),
+            {f"posts/{sha[:2]}/{sha}.png"},
+        )
@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, User
+from posts.timeline import MergedTimeline, follow_timeline
+
+
+class MergedTimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username="reader")
+        cls.authors = [
+            User.objects.create_user(username=f"author_{i}") for i in range(3)
+        ]
+        for number in range(15):
+            Post.objects.create(
+                text=f"Пост {number}", author=cls.authors[number % 3]
+            )
+        Post.objects.create(text="Чужой", author=cls.reader)
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_ids = {author.pk for author in self.authors}
+        self.expected = list(
+            Post.objects.filter(author_id__in=self.author_ids).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def page_ids(self, posts, number, per_page=4):
+        page = Paginator(posts, per_page).get_page(number)
+        return [post.pk for post in page]
+
+    def test_merge_matches_join_order(self):
+        """Слияние дает те же страницы, что и общий запрос."""
+        timeline = MergedTimeline(self.author_ids)
+        self.assertEqual(timeline.count(), 15)
+        for number in range(1, 5):
+            with self.subTest(page=number):
+                self.assertEqual(
+                    self.page_ids(MergedTimeline(self.author_ids), number),
+                    self.expected[(number - 1) * 4:number * 4],
+                )
+
+    def test_deep_pages_fall_back_to_query(self):
+        """Страницы глубже закэшированных списков читаются запросом."""
+        timeline = MergedTimeline(self.author_ids, depth=2)
+        self.assertEqual(timeline.count(), 15)
+        self.assertEqual(self.page_ids(timeline, 2), self.expected[4:8])
+
+    def test_warm_page_reads_only_needed_posts(self):
+        """С теплым кэшем страница - один запрос постов по pk."""
+        self.page_ids(MergedTimeline(self.author_ids), 1)
+        with self.assertNumQueries(1):
+            self.page_ids(MergedTimeline(self.author_ids), 1)
+
+    def test_new_post_resets_author_list(self):
+        """Новый пост сразу попадает в ленту."""
+        self.page_ids(MergedTimeline(self.author_ids), 1)
+        post = Post.objects.create(text="Новый", author=self.authors[0])
+        self.assertEqual(
+            self.page_ids(MergedTimeline(self.author_ids), 1)[0], post.pk
+        )
+
+    @override_settings(FEED_MERGE_MAX_AUTHORS=2)
+    def test_many_follows_use_join(self):
+        """При большом числе подписок лента читается одним запросом."""
+        self.assertNotIsInstance(
+            follow_timeline(self.reader), MergedTimeline
+        )
+
+    def test_follow_index_uses_merge(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(
+            [post.pk for post in response.context["page_obj"]],
+            self.expected[:10],
+        )
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("bench_follow_feed", "reader", repeat=1, stdout=out)
+        self.assertIn("join", out.getvalue())
+        self.assertIn("merge", out.getvalue())
+
+    def test_cold_cache_reads_all_authors_in_one_query(self):
+        """Холодные списки всех авторов читаются одним запросом."""
+        with self.assertNumQueries(2):
+            self.page_ids(MergedTimeline(self.author_ids), 1)
+        recent = MergedTimeline(self.author_ids).recent
+        for author in self.authors:
+            self.assertEqual(
+                [pk for _, pk in recent[author.pk]],
+                list(
+                    Post.objects.filter(author=author).values_list(
+                        "pk", flat=True
+                    )
+                ),
+            )
+
+    def test_follow_index_many_authors_within_budget(self):
+        """Лента 15 авторов с холодным кэшем укладывается в бюджет."""
+        for number in range(12):
+            author = User.objects.create_user(username=f"extra_{number}")
+            Post.objects.create(text="Пост", author=author)
+            Follow.objects.create(user=self.reader, author=author)
+        cache.clear()
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(response.status_code, 200)
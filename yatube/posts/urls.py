@@ -9,7 +9,11 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("create/", views.post_create, name="post_create"),
     # Страница сообществ
+    path("groups/", views.group_index, name="group_index"),
+    path("groups/mine/", views.my_groups, name="my_groups"),
     path("group/<slug:slug>/", views.group_posts, name="group_list"),
+    path("group/<slug:slug>/join/", views.group_join, name="group_join"),
+    path("group/<slug:slug>/leave/", views.group_leave, name="group_leave"),
     # Профайл пользователя
     path("profile/<str:username>/", views.profile, name="profile"),
     # Просмотр записи
@@ -20,8 +24,14 @@ urlpatterns = [
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
+    path(
+        "posts/<int:post_id>/comments/<int:comment_id>/",
+        views.comment_thread,
+        name="comment_thread",
+    ),
     # follow
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/updates/", views.follow_updates, name="follow_updates"),
     path(
         "profile/<str:username>/follow/",
         views.profile_follow,
@@ -32,6 +42,7 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow",
     ),
+    path("notifications/", views.notifications, name="notifications"),
     path("posts/<post_id>/delete/", views.post_delete, name="post_delete"),
     path(
         "posts/<comment_id>/comment_delete/",
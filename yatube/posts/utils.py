@@ -1,9 +1,195 @@
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import (
+    Count,
+    Exists,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+)
+from django.db.models.functions import Concat, Substr
+
+from core.cache import expire, get_or_compute
+from .models import PATH_STEP, Comment, Follow, Group, Membership, Post
 
 POST_COUNT_PER_PAGE = 10
+FOLLOWING_CACHE_KEY = "following_ids:{}"
+FOLLOWING_CACHE_TIMEOUT = 60 * 15
+GROUP_IDS_CACHE_KEY = "group_ids:{}"
+GROUP_DIRECTORY_CACHE_KEY = "group_directory"
+GROUP_DIRECTORY_CACHE_TIMEOUT = 60 * 60
+GROUP_PREVIEW_LENGTH = 200
+COMMENT_REPLIES_SHOWN = 3
+# Колонки posts_post, которых хватает карточке поста в ленте
+FEED_FIELDS = (
+    "text_preview",
+    "pub_date",
+    "author_id",
+    "author_username",
+    "author_full_name",
+    "image",
+    "image_variants",
+    "image_width",
+    "image_height",
+    "image_color",
+    "image_placeholder",
+    "group__title",
+    "group__slug",
+)
 
 
 def pagin(request, posts):
     paginator = Paginator(posts, POST_COUNT_PER_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def feed(posts):
+    """Посты для карточек ленты.
+
+    Читаются только нужные карточке колонки: без полного текста и без
+    соединения с auth_user.
+    """
+    return posts.select_related("group").only(*FEED_FIELDS)
+
+
+def branch(comments, path):
+    """Ответы ветки с корнем path: диапазон индекса (post, path)."""
+    return comments.filter(path__gt=path, path__lt=path + "0")
+
+
+def comment_threads(request, post):
+    """Страница корневых комментариев поста с первыми ответами.
+
+    Корни читаются запросом по индексу (post, path), ответы - еще одним:
+    для каждого корня подзапрос с LIMIT берет из диапазона индекса его
+    ветки только первые COMMENT_REPLIES_SHOWN ответов в порядке обхода
+    дерева, так что размер веток не влияет на объем чтения. В
+    hidden_replies - число остальных ответов по сохраненному счетчику,
+    целиком ветку показывает comment_thread. Удаленный корень остается
+    на странице заглушкой, пока в его ветке есть живые ответы.
+    """
+    comments = post.comments.order_by("path")
+    live_replies = Comment.objects.filter(
+        post=OuterRef("post"),
+        path__gt=OuterRef("path"),
+        path__lt=Concat(OuterRef("path"), Value("0")),
+    )
+    roots = (
+        Comment.all_objects.filter(post=post, depth=0)
+        .annotate(has_live_replies=Exists(live_replies))
+        .filter(Q(is_deleted=False) | Q(has_live_replies=True))
+        .order_by("path")
+        .select_related("author")
+    )
+    page_obj = pagin(request, roots)
+    roots = {root.path: root for root in page_obj}
+    for root in roots.values():
+        root.shown_replies = []
+    if roots:
+        first_replies = Q()
+        for path in roots:
+            first_replies |= Q(
+                pk__in=branch(comments, path).values("pk")[
+                    :COMMENT_REPLIES_SHOWN
+                ]
+            )
+        replies = comments.filter(first_replies).select_related("author")
+        for reply in replies:
+            roots[reply.path[:PATH_STEP]].shown_replies.append(reply)
+    for root in roots.values():
+        root.hidden_replies = root.replies_count - len(root.shown_replies)
+    return page_obj
+
+
+def get_following_ids(user):
+    """Множество id авторов, на которых подписан пользователь.
+
+    Читается из кэша одним ключом на пользователя, при промахе -
+    одним запросом к Follow.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    key = FOLLOWING_CACHE_KEY.format(user.pk)
+    following_ids = cache.get(key)
+    if following_ids is None:
+        following_ids = frozenset(
+            Follow.objects.filter(user=user).values_list(
+                "author_id", flat=True
+            )
+        )
+        cache.set(key, following_ids, FOLLOWING_CACHE_TIMEOUT)
+    return following_ids
+
+
+def reset_following_ids(user_id):
+    """Сбрасывает закэшированные подписки пользователя."""
+    cache.delete(FOLLOWING_CACHE_KEY.format(user_id))
+
+
+def get_group_ids(user):
+    """Множество id групп, в которых состоит пользователь."""
+    if not user.is_authenticated:
+        return frozenset()
+    key = GROUP_IDS_CACHE_KEY.format(user.pk)
+    group_ids = cache.get(key)
+    if group_ids is None:
+        group_ids = frozenset(
+            Membership.objects.filter(user=user).values_list(
+                "group_id", flat=True
+            )
+        )
+        cache.set(key, group_ids, FOLLOWING_CACHE_TIMEOUT)
+    return group_ids
+
+
+def reset_group_ids(user_id):
+    """Сбрасывает закэшированные группы пользователя."""
+    cache.delete(GROUP_IDS_CACHE_KEY.format(user_id))
+
+
+def _build_group_directory():
+    latest = Post.objects.filter(group=OuterRef("pk")).order_by("-pub_date")
+    return list(
+        Group.objects.annotate(
+            posts_count=Count("posts", filter=Q(posts__is_deleted=False)),
+            latest_post_id=Subquery(latest.values("pk")[:1]),
+            latest_pub_date=Subquery(latest.values("pub_date")[:1]),
+            latest_text=Subquery(
+                latest.annotate(
+                    preview=Substr("text", 1, GROUP_PREVIEW_LENGTH)
+                ).values("preview")[:1],
+                output_field=TextField(),
+            ),
+        )
+        .order_by("title")
+        .values(
+            "title",
+            "slug",
+            "posts_count",
+            "latest_post_id",
+            "latest_pub_date",
+            "latest_text",
+        )
+    )
+
+
+def get_group_directory():
+    """Список групп с числом постов и последним постом.
+
+    Собирается одним агрегирующим запросом и хранится в кэше; после
+    записи в Post (см. posts.signals) его пересчитывает один запрос,
+    остальные до этого получают прежний список.
+    """
+    return get_or_compute(
+        GROUP_DIRECTORY_CACHE_KEY,
+        _build_group_directory,
+        GROUP_DIRECTORY_CACHE_TIMEOUT,
+    )
+
+
+def reset_group_directory():
+    """Помечает закэшированный список групп устаревшим."""
+    expire(GROUP_DIRECTORY_CACHE_KEY)
@@ -1,12 +1,37 @@
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+
+from core.decorators import ratelimit
+from .counters import view_counters, visitor_id
+from .detail import get_post_detail
+from .feed_events import feed_hub
 from .forms import PostForm, CommentForm
-from .utils import pagin
-from .models import Group, Post, User, Follow, Comment
+from .notifications import mark_all_read, notification_buffer
+from .recent import AuthorTimeline
+from .timeline import follow_timeline, group_timeline
+from .utils import (
+    branch,
+    feed,
+    get_following_ids,
+    get_group_directory,
+    get_group_ids,
+    pagin,
+)
+from .models import (
+    Comment,
+    Follow,
+    Group,
+    Membership,
+    Notification,
+    Post,
+    User,
+)
 
 
 def index(request):
-    posts = Post.objects.all()
+    posts = feed(Post.objects.all())
     page_obj = pagin(request, posts)
     context = {
         "page_obj": page_obj,
@@ -15,12 +40,14 @@ def index(request):
 
 
 @login_required
+@ratelimit("posts:post_create", methods=("POST",))
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        feed_hub.publish(post.author_id)
         return redirect("posts:profile", username=request.user)
     return render(request, "posts/create_post.html", {"form": form})
 
@@ -43,49 +70,104 @@ def post_edit(request, post_id):
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
+    posts = feed(group.posts.all())
     page_obj = pagin(request, posts)
     context = {
         "page_obj": page_obj,
         "group": group,
+        "is_member": group.pk in get_group_ids(request.user),
     }
     return render(request, "posts/group_list.html", context)
 
 
+@login_required
+def group_join(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    Membership.objects.get_or_create(user=request.user, group=group)
+    return redirect("posts:group_list", slug=slug)
+
+
+@login_required
+def group_leave(request, slug):
+    Membership.objects.filter(
+        user=request.user, group__slug=slug
+    ).delete()
+    return redirect("posts:group_list", slug=slug)
+
+
+@login_required
+def my_groups(request):
+    page_obj = pagin(request, group_timeline(request.user))
+    context = {
+        "page_obj": page_obj,
+    }
+    return render(request, "posts/my_groups.html", context)
+
+
+def group_index(request):
+    page_obj = pagin(request, get_group_directory())
+    context = {
+        "page_obj": page_obj,
+    }
+    return render(request, "posts/group_index.html", context)
+
+
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = pagin(request, post_list)
-    follow = request.user.is_authenticated
-    if follow:
-        follow = (
-            Follow.objects.filter(author=author, user=request.user).exists()
-            and author != request.user
-        )
+    view_counters.profile_visited(author.pk, visitor_id(request))
+    page_obj = pagin(request, AuthorTimeline(author.pk))
+    follow = (
+        author.pk in get_following_ids(request.user)
+        and author != request.user
+    )
     context = {
         "author": author,
         "page_obj": page_obj,
+        "posts_count": page_obj.paginator.count,
         "following": follow,
+        "visitors": view_counters.unique_visitors(author.pk),
     }
     return render(request, "posts/profile.html", context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post, page_obj = get_post_detail(request, post_id)
+    view_counters.post_viewed(post.pk)
     form = CommentForm()
     author = post.author
     template = "posts/post_detail.html"
     context = {
         "post": post,
         "form": form,
-        "comments": comments,
+        "comments": page_obj,
+        "page_obj": page_obj,
         "author": author,
+        "reply_to": request.GET.get("reply"),
+        "views": view_counters.post_views(post.pk),
     }
     return render(request, template, context)
 
 
+def comment_thread(request, post_id, comment_id):
+    """Ветка комментария целиком, включая ответы сверх показанных под
+    постом. Читается диапазоном индекса (post, path); удаленные
+    комментарии с живыми ответами показываются заглушками."""
+    post = get_object_or_404(Post, pk=post_id)
+    comments = Comment.all_objects.filter(post=post).select_related("author")
+    root = get_object_or_404(comments, pk=comment_id)
+    page_obj = pagin(request, branch(comments, root.path).order_by("path"))
+    context = {
+        "post": post,
+        "root": root,
+        "form": CommentForm(),
+        "page_obj": page_obj,
+        "reply_to": request.GET.get("reply"),
+    }
+    return render(request, "posts/comment_thread.html", context)
+
+
 @login_required
+@ratelimit("posts:add_comment", methods=("POST",))
 def add_comment(request, post_id):
     post = Post.objects.get(id=post_id)
     form = CommentForm(request.POST or None)
@@ -93,21 +175,38 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = request.POST.get("parent", "")
+        if parent_id.isdigit():
+            comment.parent = post.comments.filter(pk=parent_id).first()
         comment.save()
+        notification_buffer.add(
+            post.author_id, Notification.COMMENT, request.user.pk, post.pk
+        )
     return redirect("posts:post_detail", post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = pagin(request, post_list)
+    page_obj = pagin(request, follow_timeline(request.user))
     context = {
         "page_obj": page_obj,
+        "feed_cursor": feed_hub.cursor,
+        "poll_interval": settings.FEED_POLL_INTERVAL,
     }
     return render(request, "posts/follow.html", context)
 
 
 @login_required
+def follow_updates(request):
+    """Сколько новых постов появилось в ленте подписок после курсора."""
+    new, cursor = feed_hub.new_posts(
+        request.GET.get("since", ""), get_following_ids(request.user)
+    )
+    return JsonResponse({"new": new, "cursor": cursor})
+
+
+@login_required
+@ratelimit("posts:profile_follow")
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if (
@@ -120,6 +219,9 @@ def profile_follow(request, username):
             user=request.user,
             author=author,
         )
+        notification_buffer.add(
+            author.pk, Notification.FOLLOW, request.user.pk
+        )
     return redirect("posts:profile", username=username)
 
 
@@ -131,12 +233,31 @@ def profile_unfollow(request, username):
     return redirect("posts:profile", username=username)
 
 
+@login_required
+def notifications(request):
+    notification_buffer.flush()
+    page_obj = pagin(
+        request,
+        request.user.notifications.select_related(
+            "post", "last_actor"
+        ).defer("post__text"),
+    )
+    # Читаем страницу до отметки о прочтении, чтобы выделить новые.
+    page_obj.object_list = list(page_obj.object_list)
+    mark_all_read(request.user)
+    context = {
+        "page_obj": page_obj,
+    }
+    return render(request, "posts/notifications.html", context)
+
+
 @login_required
 def post_delete(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect("posts:post_detail", post_id)
-    post.delete()
+    post.is_deleted = True
+    post.save(update_fields=["is_deleted"])
     return redirect("posts:index")
 
 
@@ -146,5 +267,6 @@ def comment_delete(request, comment_id):
     post_id = comment.post.id
     if comment.author != request.user:
         return redirect("posts:post_detail", comment_id)
-    comment.delete()
+    comment.is_deleted = True
+    comment.save(update_fields=["is_deleted"])
     return redirect("posts:post_detail", post_id)
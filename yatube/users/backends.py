@@ -0,0 +1,74 @@
+import copy
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from core.cache import LocalCache
+from .hashing import check_password, make_password
+
+User = get_user_model()
+
+USER_STAMP_CACHE_KEY = "user_stamp:{}"
+
+user_cache = LocalCache(
+    settings.USER_CACHE_MAXSIZE, settings.USER_CACHE_TIMEOUT
+)
+
+
+def reset_cached_user(user_id):
+    """Сбрасывает пользователя в кэшах всех процессов.
+
+    Локально запись удаляется сразу, другие процессы увидят новую
+    отметку в общем кэше и перечитают пользователя из БД. Для этого
+    CACHES должен быть общим для процессов (см. core.checks): с
+    LocMemCache остальные процессы держат старую запись до
+    USER_CACHE_TIMEOUT.
+    """
+    user_cache.delete(user_id)
+    cache.set(
+        USER_STAMP_CACHE_KEY.format(user_id),
+        uuid.uuid4().hex,
+        settings.USER_CACHE_TIMEOUT,
+    )
+
+
+class CachedUserBackend(ModelBackend):
+    """ModelBackend, который не читает пользователя из БД на каждый запрос.
+
+    AuthenticationMiddleware вызывает get_user() при каждом просмотре
+    страницы; здесь пользователь берется из LRU-кэша процесса и
+    сверяется с отметкой в общем кэше. Пароль при входе проверяется
+    в пуле потоков users.hashing.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Хешируем впустую, чтобы время ответа не выдавало,
+            # существует ли пользователь.
+            make_password(password)
+            return None
+        if check_password(user, password) and self.user_can_authenticate(
+            user
+        ):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        stamp = cache.get(USER_STAMP_CACHE_KEY.format(user_id))
+        entry = user_cache.get(user_id)
+        if entry is not None and entry[1] == stamp:
+            return copy.copy(entry[0])
+        user = super().get_user(user_id)
+        if user is not None:
+            user_cache.set(user_id, (user, stamp))
+            user = copy.copy(user)
+        return user
@@ -1,6 +1,9 @@
+from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
 
+from .hashing import make_password
+
 
 User = get_user_model()
 
@@ -13,3 +16,11 @@ class CreationForm(UserCreationForm):
         model = User
         # укажем, какие поля должны быть видны в форме и в каком порядке
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def save(self, commit=True):
+        # Пароль хешируем в пуле потоков вместо user.set_password().
+        user = forms.ModelForm.save(self, commit=False)
+        user.password = make_password(self.cleaned_data['password1'])
+        if commit:
+            user.save()
+        return user
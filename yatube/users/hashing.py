@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_executor = None
+
+
+def _run(func, *args):
+    """Выполняет хеширование в ограниченном пуле потоков.
+
+    Хеширование пароля - чистая нагрузка на CPU, а hashlib и argon2
+    отпускают GIL. Пул ограничивает число одновременных вычислений,
+    чтобы волна входов не отнимала процессор у остальных запросов.
+    При PASSWORD_HASHING_WORKERS = 0 хеш считается в текущем потоке.
+    """
+    global _executor
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return func(*args)
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS,
+            thread_name_prefix="password-hashing",
+        )
+    return _executor.submit(func, *args).result()
+
+
+def make_password(raw_password):
+    return _run(hashers.make_password, raw_password)
+
+
+def check_password(user, raw_password):
+    """Проверяет пароль пользователя и при необходимости перехеширует.
+
+    Если пароль сохранен устаревшим хешером или с меньшим числом
+    итераций, он пересчитывается основным хешером из PASSWORD_HASHERS.
+    Запись в БД выполняется в потоке запроса, а не в пуле.
+    """
+    outdated = []
+    valid = _run(
+        hashers.check_password, raw_password, user.password, outdated.append
+    )
+    if outdated:
+        user.password = make_password(raw_password)
+        user.save(update_fields=["password"])
+    return valid
@@ -0,0 +1,47 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+PASSWORD = "bench-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет, сколько проверок пароля (входов) в секунду выдерживает "
+        "каждый хешер из PASSWORD_HASHERS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PASSWORD_HASHING_WORKERS or 1,
+            help="Число потоков, как в пуле users.hashing.",
+        )
+
+    def handle(self, *args, **options):
+        rounds = options["rounds"]
+        workers = options["workers"]
+        cores = min(workers, os.cpu_count() or 1)
+        for path in settings.PASSWORD_HASHERS:
+            hasher = import_string(path)()
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(
+                    executor.map(
+                        lambda _: check_password(PASSWORD, encoded),
+                        range(rounds),
+                    )
+                )
+            per_second = rounds / (time.perf_counter() - started)
+            self.stdout.write(
+                f"{hasher.algorithm}: {per_second:.1f} входов/с, "
+                f"{per_second / cores:.1f} на ядро ({workers} потоков)"
+            )
@@ -0,0 +1,122 @@
+import multiprocessing
+import tempfile
+
+from django.core.cache import cache
+from django.contrib.auth.hashers import make_password
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from users.backends import CachedUserBackend, reset_cached_user, user_cache
+
+INDEX = reverse("posts:index")
+
+
+class CachedSessionUserTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="reader")
+        Post.objects.create(text="Пост", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_authorized_index_costs_as_anonymous(self):
+        """Сессия и пользователь не добавляют запросов к БД."""
+        self.client.get(INDEX)
+        self.authorized_client.get(INDEX)
+        with self.assertNumQueries(1):
+            self.client.get(INDEX)
+        with self.assertNumQueries(1):
+            self.authorized_client.get(INDEX)
+
+    def test_user_save_resets_cached_user(self):
+        """Сохранение пользователя сбрасывает его кэш."""
+        backend = CachedUserBackend()
+        self.assertEqual(backend.get_user(self.user.pk).first_name, "")
+        self.user.first_name = "Иван"
+        self.user.save()
+        self.assertEqual(backend.get_user(self.user.pk).first_name, "Иван")
+
+    def test_reset_in_other_process_reloads_user(self):
+        """Сброс в другом процессе виден через общий кэш."""
+        backend = CachedUserBackend()
+        with tempfile.TemporaryDirectory() as location:
+            shared = {
+                "default": {
+                    "BACKEND": (
+                        "django.core.cache.backends.filebased.FileBasedCache"
+                    ),
+                    "LOCATION": location,
+                }
+            }
+            with override_settings(CACHES=shared):
+                backend.get_user(self.user.pk)
+                with self.assertNumQueries(0):
+                    backend.get_user(self.user.pk)
+                process = multiprocessing.get_context("fork").Process(
+                    target=reset_cached_user, args=(self.user.pk,)
+                )
+                process.start()
+                process.join()
+                with self.assertNumQueries(1):
+                    backend.get_user(self.user.pk)
+
+    def test_password_change_keeps_session(self):
+        """После смены пароля пользователь остается в системе."""
+        self.user.set_password("old-password-123")
+        self.user.save()
+        self.authorized_client.force_login(self.user)
+        self.authorized_client.post(
+            reverse("password_change"),
+            {
+                "old_password": "old-password-123",
+                "new_password1": "new-password-456",
+                "new_password2": "new-password-456",
+            },
+        )
+        response = self.authorized_client.get(INDEX)
+        self.assertTrue(response.context["user"].is_authenticated)
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+        "django.contrib.auth.hashers.SHA1PasswordHasher",
+    ],
+    PASSWORD_HASHING_WORKERS=2,
+)
+class PasswordHashingTests(TestCase):
+    def test_login_in_pool_rehashes_outdated_password(self):
+        """Вход проверяет пароль в пуле и перехеширует старый хеш."""
+        user = User.objects.create(
+            username="old",
+            password=make_password("pass-123", hasher="sha1"),
+        )
+        self.assertTrue(self.client.login(username="old", password="pass-123"))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("md5$"))
+
+    def test_wrong_password_rejected(self):
+        """Неверный пароль и неизвестный пользователь не проходят."""
+        User.objects.create_user(username="user", password="pass-123")
+        self.assertFalse(self.client.login(username="user", password="x"))
+        self.assertFalse(self.client.login(username="nobody", password="x"))
+
+    def test_signup_hashes_with_preferred_hasher(self):
+        """Регистрация сохраняет пароль основным хешером."""
+        self.client.post(
+            reverse("users:signup"),
+            {
+                "username": "new",
+                "password1": "Strong-pass-987",
+                "password2": "Strong-pass-987",
+            },
+        )
+        user = User.objects.get(username="new")
+        self.assertTrue(user.password.startswith("md5$"))
+        self.assertTrue(user.check_password("Strong-pass-987"))
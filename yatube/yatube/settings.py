@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,10 +23,86 @@ LOGIN_URL = "users:login"
 
 LOGIN_REDIRECT_URL = "posts:index"
 
+# Раз во сколько секунд открытая лента подписок спрашивает о новых постах
+FEED_POLL_INTERVAL = 30
+# Ленты подписок и групп до FEED_MERGE_MAX_AUTHORS авторов (групп)
+# собирать слиянием последних FEED_MERGE_DEPTH постов каждого источника,
+# а не одним запросом
+FEED_MERGE_MAX_AUTHORS = 100
+FEED_MERGE_MAX_GROUPS = 100
+FEED_MERGE_DEPTH = 100
+# Последние посты авторов в памяти процесса: постов на автора, общий
+# бюджет памяти в байтах и срок жизни списка в секундах
+RECENT_POSTS_PER_AUTHOR = 100
+RECENT_POSTS_MEMORY = 32 * 1024 * 1024
+RECENT_POSTS_TIMEOUT = 60 * 5
+# Сколько живет закэшированный пакет страницы поста
+POST_DETAIL_TIMEOUT = 60 * 5
+
+# Лимиты запросов к пишущим view: (число запросов, окно в секундах)
+RATELIMITS = {
+    "posts:post_create": (10, 60),
+    "posts:add_comment": (20, 60),
+    "posts:profile_follow": (30, 60),
+}
+
+# Размер пачки для заданий массовой модерации
+MODERATION_BATCH_SIZE = 1000
+
+# Страницы, посещения которых учитываются для прогрева кэша
+CACHE_WARM_VIEWS = (
+    "posts:index",
+    "posts:group_index",
+    "posts:group_list",
+    "posts:profile",
+)
+# Сколько самых посещаемых страниц прогревать
+CACHE_WARM_TOP = 20
+# Прогревать страницы в фоне после записи постов
+CACHE_WARM_AFTER_INVALIDATE = False
+
+# Сессии: cached_db читает сессию из кэша, signed_cookies - из cookie
+SESSION_ENGINE = os.getenv(
+    "SESSION_ENGINE", "django.contrib.sessions.backends.cached_db"
+)
+# Сохранять сессию только если она изменилась
+SESSION_SAVE_EVERY_REQUEST = False
+
+AUTHENTICATION_BACKENDS = ["users.backends.CachedUserBackend"]
+# Кэш пользователей в памяти процесса: размер и срок жизни в секундах
+USER_CACHE_MAXSIZE = 10000
+USER_CACHE_TIMEOUT = 60
+
+# Уведомления пишутся в БД пачками: по числу ключей или по таймеру
+# через столько секунд после первого события
+NOTIFICATIONS_FLUSH_SIZE = 500
+NOTIFICATIONS_FLUSH_INTERVAL = 5
+
+# Просмотры постов и посетители профилей сбрасываются пачками
+VIEW_COUNTS_FLUSH_SIZE = 1000
+VIEW_COUNTS_FLUSH_INTERVAL = 10
+
+# Бюджет запросов к БД на страницу: число запросов и суммарное время SQL
+# в секундах. Превышение пишется в лог, а при QUERY_BUDGET_RAISE - ошибка.
+QUERY_BUDGETS = {
+    "posts:index": {"queries": 8, "time": 0.5},
+    "posts:profile": {"queries": 10, "time": 0.5},
+    "posts:post_detail": {"queries": 12, "time": 0.5},
+    "posts:follow_index": {"queries": 10, "time": 0.5},
+}
+QUERY_BUDGET_RAISE = False
+
 # LOGOUT_REDIRECT_URL = 'posts:index'
+# Кэш по умолчанию - в памяти процесса, для разработки. В работе с
+# несколькими процессами нужен общий кэш с атомарными add/incr:
+# memcached или redis через CACHE_BACKEND и CACHE_LOCATION (см.
+# core.checks, manage.py check --deploy).
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
     }
 }
 
@@ -48,6 +125,9 @@ ALLOWED_HOSTS = [
 # Application definition
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Картинки моложе стольких секунд не удаляются как мусор: пост с только
+# что загруженным или повторно загруженным файлом может быть еще не сохранен
+MEDIA_GARBAGE_MIN_AGE = 60 * 60
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 # указываем директорию, в которую будут складываться файлы писем
@@ -68,12 +148,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.PageHitsMiddleware",
 ]
 
 ROOT_URLCONF = "yatube.urls"
@@ -93,6 +175,8 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "core.context_processors.year.year",
+                "core.context_processors.following.following",
+                "core.context_processors.notifications.notifications",
             ]
         },
     }
@@ -108,8 +192,12 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        # Соединение живет между запросами вместо открытия на каждый
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
     }
 }
+# Проверять переиспользуемые соединения в начале запроса
+DB_HEALTH_CHECKS = True
 
 
 # Password validation
@@ -131,6 +219,25 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Первым идет хешер для новых паролей; пароли, сохраненные остальными,
+# перехешируются при входе. Argon2 и bcrypt - если установлены
+# argon2-cffi и bcrypt соответственно.
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+if find_spec("bcrypt"):
+    PASSWORD_HASHERS.insert(
+        0, "django.contrib.auth.hashers.BCryptSHA256PasswordHasher"
+    )
+if find_spec("argon2"):
+    PASSWORD_HASHERS.insert(
+        0, "django.contrib.auth.hashers.Argon2PasswordHasher"
+    )
+# Сколько паролей хешируется одновременно (0 - в потоке запроса)
+PASSWORD_HASHING_WORKERS = os.cpu_count() or 1
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
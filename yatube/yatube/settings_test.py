@@ -0,0 +1,19 @@
+"""Настройки для тестов: manage.py test и pytest (см. pytest.ini)."""
+from .settings import *  # noqa: F401,F403
+
+# В тестах надежность хеша не нужна, нужна скорость
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+PASSWORD_HASHING_WORKERS = 0
+QUERY_BUDGET_RAISE = True
+# Откат транзакций в тестах не виден кэшу в памяти процесса
+RECENT_POSTS_TIMEOUT = 0
+POST_DETAIL_TIMEOUT = 0
+# Уведомления пишутся сразу: таймер сброса писал бы в БД из другого
+# потока мимо транзакции теста
+NOTIFICATIONS_FLUSH_INTERVAL = 0
+# Тесты не должны видеть кэш запущенного сервера и друг друга
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}